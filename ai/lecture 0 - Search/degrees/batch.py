@@ -0,0 +1,121 @@
+"""
+Answers a file of degrees of separation queries with a single load of
+the dataset.
+
+Usage: python batch.py queries [directory] [--workers N] [--compact]
+
+Every line of the queries file is a CSV pair "source,target" of names or
+IMDB person ids. One JSON object per query is written to the standard
+output, in input order, and the throughput is reported on the standard
+error when all the queries are answered.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import degrees
+from graph import CompactGraph
+
+# The compact graph, when the batch runs on it. Like the degrees dicts it
+# is loaded before the workers are forked, so they share it copy-on-write.
+graph = None
+
+
+def resolve(name):
+    """
+    Returns (person_id, error) for a name or an IMDB person id,
+    without asking anything on ambiguous names.
+    """
+    if graph is not None:
+        if name in graph.person_index:
+            return name, None
+        candidates = [graph.person_ids[index] for index in graph.names.get(name.lower(), [])]
+    else:
+        if name in degrees.people:
+            return name, None
+        candidates = sorted(degrees.names.get(name.lower(), set()))
+    if len(candidates) == 0:
+        return None, "Person not found."
+    elif len(candidates) > 1:
+        return None, f"Ambiguous name, candidates: {', '.join(candidates)}"
+    return candidates[0], None
+
+
+def answer(pair):
+    """
+    Answers one (source, target) query and returns its JSON line.
+    """
+    result = {"source": pair[0], "target": pair[1]}
+    source, error = resolve(pair[0])
+    if error is None:
+        target, error = resolve(pair[1])
+    if error is not None:
+        result["error"] = error
+        return json.dumps(result)
+
+    if graph is not None:
+        path = graph.shortest_path(graph.person_index[source], graph.person_index[target])
+        if path is not None:
+            path = graph.path_ids(path)
+    else:
+        path = degrees.shortest_path(source, target, bidirectional=True)
+    if path is None:
+        result["degrees"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [list(step) for step in path]
+    return json.dumps(result)
+
+
+def read_queries(filename):
+    with open(filename, encoding="utf-8", newline="") as f:
+        return [(row[0].strip(), row[1].strip()) for row in csv.reader(f) if len(row) >= 2]
+
+
+def main():
+    global graph
+    parser = argparse.ArgumentParser()
+    parser.add_argument("queries")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the integer indexed graph representation")
+    parser.add_argument("--no-snapshot", dest="use_snapshot", action="store_false",
+                        help="always parse the CSV files")
+    args = parser.parse_args()
+
+    queries = read_queries(args.queries)
+
+    print("Loading data...", file=sys.stderr)
+    if args.compact:
+        graph = CompactGraph.load(args.directory, args.use_snapshot)
+    else:
+        degrees.load_data(args.directory, args.use_snapshot)
+    print("Data loaded.", file=sys.stderr)
+
+    start = time.perf_counter()
+    # the workers can only share the loaded graph if they are forked
+    if args.workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        chunksize = max(1, min(64, len(queries) // (args.workers * 8)))
+        with context.Pool(args.workers) as pool:
+            for line in pool.imap(answer, queries, chunksize):
+                print(line)
+    else:
+        for query in queries:
+            print(answer(query))
+    seconds = time.perf_counter() - start
+
+    rate = len(queries) / seconds if seconds > 0 else float("inf")
+    print(f"Answered {len(queries)} queries in {seconds:.2f} s ({rate:.1f} queries/s).",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
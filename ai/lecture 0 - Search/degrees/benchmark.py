@@ -0,0 +1,233 @@
+"""
+Benchmarks for the degrees search.
+
+Usage: python benchmark.py frontier [directory] [--nodes N] [--sources N]
+       python benchmark.py load [directory]
+       python benchmark.py suite [directory] [--queries N] [--modes M,M]
+
+suite measures load time and memory, then the query latency percentiles
+of every search mode on the same random pairs. Datasets of any size can
+be made with generate.py.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import degrees
+from graph import CompactGraph
+from util import Node, QueueFrontier
+
+
+class ListQueueFrontier():
+    """
+    The original list based queue frontier, kept only as the baseline:
+    visited states are a list and every remove copies the frontier.
+    """
+    def __init__(self, target):
+        self.frontier = []
+        self.target = target
+        self.visitedStates = []
+
+    def add(self, node):
+        if node.state in self.visitedStates:
+            return False
+        self.visitedStates.append(node.state)
+        self.frontier.append(node)
+        return node.state == self.target
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def explore(frontier_class, source, limit):
+    """
+    Runs a breadth first search from source that never finds its target,
+    stopping after limit expansions. Returns the number of expanded people.
+    """
+    frontier = frontier_class(None)
+    frontier.add(Node(source, None, None))
+    expanded = 0
+    while not frontier.empty() and expanded < limit:
+        current = frontier.remove()
+        expanded += 1
+        for movie_id, person_id in degrees.neighbors_for_person(current.state):
+            frontier.add(Node(person_id, current, movie_id))
+    return expanded
+
+
+def frontier_throughput(frontier_class, sources, limit):
+    """
+    Returns the people expanded per second by frontier_class.
+    """
+    expanded = 0
+    start = time.perf_counter()
+    for source in sources:
+        expanded += explore(frontier_class, source, limit)
+    return expanded / (time.perf_counter() - start)
+
+
+def resident_memory():
+    """
+    Returns the resident set size of this process in bytes.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # not on Linux: fall back to the peak size, reported in KiB (bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure_load(representation, directory, use_snapshot):
+    """
+    Loads directory with the given representation and returns the load
+    time and the growth of the resident memory.
+    """
+    before = resident_memory()
+    start = time.perf_counter()
+    if representation == "dict":
+        degrees.load_data(directory, use_snapshot)
+    else:
+        graph = CompactGraph.load(directory, use_snapshot)
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "bytes": resident_memory() - before}
+
+
+def run_frontier(args):
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    random.seed(args.seed)
+    sources = random.sample(sorted(degrees.people), min(args.sources, len(degrees.people)))
+
+    before = frontier_throughput(ListQueueFrontier, sources, args.nodes)
+    after = frontier_throughput(QueueFrontier, sources, args.nodes)
+    print(f"List frontier:  {before:12.0f} nodes/s")
+    print(f"Hash frontier:  {after:12.0f} nodes/s")
+    print(f"Speedup:        {after / before:12.1f}x")
+
+
+def measure(representation, directory, source):
+    """
+    Measures one load in a fresh interpreter, so that memory freed by a
+    previous load cannot be reused.
+    """
+    command = [sys.executable, __file__, "measure", representation, directory]
+    if source == "csv":
+        command.append("--no-snapshot")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def run_load(args):
+    for representation in ["dict", "compact"]:
+        # the first snapshot load writes the snapshot if it is missing or stale
+        measure(representation, args.directory, "snapshot")
+        for source in ["csv", "snapshot"]:
+            result = measure(representation, args.directory, source)
+            print(f"{representation:8} from {source:9} load {result['seconds']:8.2f} s, "
+                  f"resident memory {result['bytes'] / 2 ** 20:8.1f} MiB")
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest rank percentile of sorted values.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def query_modes(graph):
+    """
+    Returns the search modes of the suite, as name -> function(source, target)
+    taking IMDB person ids.
+    """
+    def compact(source, target):
+        return graph.shortest_path(graph.person_index[source], graph.person_index[target])
+
+    return {
+        "unidirectional": lambda source, target: degrees.shortest_path(source, target),
+        "bidirectional": lambda source, target: degrees.shortest_path(source, target, True),
+        "compact": compact,
+    }
+
+
+def run_suite(args):
+    run_load(args)
+
+    degrees.load_data(args.directory)
+    graph = CompactGraph.load(args.directory)
+    random.seed(args.seed)
+    people = sorted(degrees.people)
+    pairs = [(random.choice(people), random.choice(people)) for _ in range(args.queries)]
+    connected = sum(1 for source, target in pairs if degrees.components.connected(source, target))
+    print(f"{len(pairs)} random pairs, {connected} connected.")
+
+    modes = query_modes(graph)
+    for name in args.modes.split(","):
+        search = modes[name]
+        latencies = []
+        for source, target in pairs:
+            start = time.perf_counter()
+            search(source, target)
+            latencies.append(1000 * (time.perf_counter() - start))
+        latencies.sort()
+        print(f"{name:14} p50 {percentile(latencies, 0.5):8.2f} ms, "
+              f"p90 {percentile(latencies, 0.9):8.2f} ms, "
+              f"p99 {percentile(latencies, 0.99):8.2f} ms, "
+              f"max {latencies[-1]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    frontier = commands.add_parser("frontier", help="list vs hash frontier throughput")
+    frontier.add_argument("directory", nargs="?", default="large")
+    frontier.add_argument("--nodes", type=int, default=20000,
+                          help="expansions per search")
+    frontier.add_argument("--sources", type=int, default=5,
+                          help="number of random sources")
+    frontier.add_argument("--seed", type=int, default=0)
+
+    load = commands.add_parser("load", help="load time and memory of each representation")
+    load.add_argument("directory", nargs="?", default="large")
+
+    suite = commands.add_parser("suite", help="load, memory and query latency percentiles")
+    suite.add_argument("directory", nargs="?", default="large")
+    suite.add_argument("--queries", type=int, default=200,
+                       help="number of random pairs")
+    suite.add_argument("--modes", default="bidirectional,compact",
+                       help="comma separated search modes: unidirectional, bidirectional, compact")
+    suite.add_argument("--seed", type=int, default=0)
+
+    measure = commands.add_parser("measure")
+    measure.add_argument("representation", choices=["dict", "compact"])
+    measure.add_argument("directory")
+    measure.add_argument("--no-snapshot", dest="use_snapshot", action="store_false")
+
+    args = parser.parse_args()
+    if args.command == "frontier":
+        run_frontier(args)
+    elif args.command == "load":
+        run_load(args)
+    elif args.command == "suite":
+        run_suite(args)
+    else:
+        print(json.dumps(measure_load(args.representation, args.directory, args.use_snapshot)))
+
+
+if __name__ == "__main__":
+    main()
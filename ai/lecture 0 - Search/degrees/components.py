@@ -0,0 +1,107 @@
+"""
+Connected components of the co-star graph.
+
+Two people are in the same component when a chain of shared movies links
+them, so a search between different components can only fail. The
+components are found once with a union-find over the casts of all the
+movies, then every person gets a dense component label, which makes the
+"Not connected" answer a constant time comparison.
+"""
+
+from array import array
+
+
+class ComponentIndex():
+    def __init__(self, labels, sizes):
+        # Person (IMDB id or compact index) -> component label
+        self.labels = labels
+        # Component label -> number of people, largest component first
+        self.sizes = sizes
+
+    def connected(self, a, b):
+        return self.labels[a] == self.labels[b]
+
+    def component_size(self, person):
+        return self.sizes[self.labels[person]]
+
+    def summary(self, top=10):
+        """
+        Returns a short description of the component sizes.
+        """
+        largest = ", ".join(str(size) for size in self.sizes[:top])
+        singletons = sum(1 for size in self.sizes if size == 1)
+        return (f"{len(self.sizes)} components, {singletons} of a single person; "
+                f"largest: {largest}")
+
+
+class UnionFind():
+    def __init__(self, n):
+        self.parent = array("l", range(n))
+        self.size = array("l", [1]) * n
+
+    def find(self, i):
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        # path compression
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(self, i, j):
+        i = self.find(i)
+        j = self.find(j)
+        if i == j:
+            return
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+
+    def labels(self):
+        """
+        Returns an array of dense labels, numbered by decreasing component
+        size, and the list of the component sizes.
+        """
+        n = len(self.parent)
+        roots = [self.find(i) for i in range(n)]
+        by_size = sorted(set(roots), key=lambda root: -self.size[root])
+        numbers = {root: number for number, root in enumerate(by_size)}
+        labels = array("l", [numbers[root] for root in roots])
+        return labels, [self.size[root] for root in by_size]
+
+
+def from_casts(n, casts):
+    """
+    Returns the dense labels and sizes for n people, given an iterable
+    of casts (iterables of person indexes that starred together).
+    """
+    union_find = UnionFind(n)
+    for cast in casts:
+        first = None
+        for person in cast:
+            if first is None:
+                first = person
+            else:
+                union_find.union(first, person)
+    return union_find.labels()
+
+
+def build_from_dicts(people, movies):
+    """
+    Builds the index of the degrees people and movies dicts.
+    """
+    numbers = {person_id: number for number, person_id in enumerate(people)}
+    casts = ((numbers[person_id] for person_id in movie["stars"]) for movie in movies.values())
+    labels, sizes = from_casts(len(numbers), casts)
+    return ComponentIndex(dict(zip(people, labels)), sizes)
+
+
+def build_from_compact(graph):
+    """
+    Builds the index of a CompactGraph, labelled by person index.
+    """
+    casts = (graph.stars_of(movie) for movie in range(len(graph.movie_ids)))
+    labels, sizes = from_casts(len(graph.person_ids), casts)
+    return ComponentIndex(labels, sizes)
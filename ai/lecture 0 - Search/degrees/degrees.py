@@ -1,7 +1,14 @@
+import argparse
 import csv
+import heapq
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from components import ComponentIndex, build_from_dicts
+from graph import CompactGraph
+from nameindex import NameIndex
+from util import Node, StackFrontier, QueueFrontier, join_paths
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +19,41 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Connected components of the people, built by load_data
+components = None
 
-def load_data(directory):
+# Prefix and fuzzy index of the names, built by load_data
+name_index = None
+
+# Counters of the last search, used to compare the search strategies
+stats = {"expanded": 0}
+
+
+def load_data(directory, use_snapshot=True):
     """
     Load data from CSV files into memory.
+
+    The loaded data is saved to a binary snapshot next to the CSV files,
+    and later loads read that snapshot for as long as the CSV files are
+    unchanged.
     """
+    global components, name_index
+    if use_snapshot:
+        sources = snapshot.fingerprint(directory)
+        path = snapshot.snapshot_path(directory, "dict")
+        sections = snapshot.read(path, sources, [
+            "names", "people", "movies", "component_labels", "component_sizes",
+            "sorted_names", "name_popularity", "name_deletes", "name_top"
+        ])
+        if sections is not None:
+            names.update(sections["names"])
+            people.update(sections["people"])
+            movies.update(sections["movies"])
+            components = ComponentIndex(sections["component_labels"], sections["component_sizes"])
+            name_index = NameIndex(sections["sorted_names"], sections["name_popularity"],
+                                   sections["name_deletes"], sections["name_top"])
+            return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,16 +88,60 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    components = build_from_dicts(people, movies)
+    name_index = NameIndex.build(names, people)
+
+    if use_snapshot:
+        snapshot.write(path, sources, {
+            "names": names, "people": people, "movies": movies,
+            "component_labels": components.labels, "component_sizes": components.sizes,
+            "sorted_names": name_index.sorted_names,
+            "name_popularity": name_index.popularity,
+            "name_deletes": name_index.deletes,
+            "name_top": name_index.top
+        })
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(usage="python degrees.py [directory]")
+    parser.add_argument("directory", nargs="?", default="large")
+    search = parser.add_mutually_exclusive_group()
+    search.add_argument("--bidirectional", action="store_true", default=None,
+                        help="search from both people at once (default for large)")
+    search.add_argument("--unidirectional", dest="bidirectional", action="store_false",
+                        help="search only from the first person")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the integer indexed graph representation")
+    parser.add_argument("--components", action="store_true",
+                        help="print the sizes of the connected components and exit")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="first print the bounds on the degrees of separation "
+                             "given by the landmark index built by landmarks.py")
+    parser.add_argument("--no-snapshot", dest="use_snapshot", action="store_false",
+                        help="always parse the CSV files")
+    args = parser.parse_args()
+    directory = args.directory
+    bidirectional = args.bidirectional
+    if bidirectional is None:
+        bidirectional = os.path.basename(os.path.normpath(directory)) == "large"
+    if args.compact:
+        main_compact(directory, bidirectional, args.use_snapshot, args.components)
+        return
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, args.use_snapshot)
     print("Data loaded.")
+    if args.components:
+        print(components.summary())
+        return
+    landmarks = None
+    if args.landmarks:
+        # imported here, landmarks.py itself imports this module
+        from landmarks import LandmarkIndex
+        landmarks = LandmarkIndex.load(directory)
+        if landmarks is None:
+            sys.exit(f"No landmark index, run: python landmarks.py {directory}")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +150,13 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if landmarks is not None:
+        lower, upper = landmarks.bounds(source, target)
+        if lower is not None:
+            print(f"Between {lower} and {upper if upper is not None else '?'} degrees.")
+    # the landmark A* expands more people than the bidirectional search
+    path = shortest_path(source, target, bidirectional)
+    print(f"Expanded {stats['expanded']} people.")
 
     if path is None:
         print("Not connected.")
@@ -84,20 +171,63 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def main_compact(directory, bidirectional, use_snapshot, show_components):
+    """
+    Same as main, but on the integer indexed CompactGraph.
+    """
+    print("Loading data...")
+    graph = CompactGraph.load(directory, use_snapshot)
+    print("Data loaded.")
+    if show_components:
+        print(graph.components.summary())
+        return
+
+    source = graph.person_id_for_name(input("Name: "))
+    if source is None:
+        sys.exit("Person not found.")
+    target = graph.person_id_for_name(input("Name: "))
+    if target is None:
+        sys.exit("Person not found.")
+
+    path = graph.shortest_path(source, target, bidirectional)
+    print(f"Expanded {graph.stats['expanded']} people.")
+
+    if path is None:
+        print("Not connected.")
+    else:
+        degrees = len(path)
+        print(f"{degrees} degrees of separation.")
+        path = [(None, source)] + path
+        for i in range(degrees):
+            person1 = graph.person_names[path[i][1]]
+            person2 = graph.person_names[path[i + 1][1]]
+            movie = graph.movie_titles[path[i + 1][0]]
+            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def shortest_path(source, target, bidirectional=False, landmarks=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
     """
+    stats["expanded"] = 0
     if source == target:
         return []
+    if components is not None and not components.connected(source, target):
+        return None
+    if landmarks is not None:
+        return landmark_path(source, target, landmarks)
+    if bidirectional:
+        return bidirectional_path(source, target)
     # initializing the problem
     queue = QueueFrontier(target)
+    explored = set()
     head = Node(source, None, None)
     queue.add(head)
-    for neighbor in neighbors_for_person(source):
+    stats["expanded"] += 1
+    for neighbor in unexplored_neighbors(source, explored):
         if queue.add(Node(neighbor[1], head, neighbor[0])):
             return getPath(Node(neighbor[1], head, neighbor[0]), source)
     if queue.empty(): #if the source is not in any film
@@ -105,11 +235,112 @@ def shortest_path(source, target):
 
     while not queue.empty():
         current = queue.remove()
-        for neighbor in neighbors_for_person(current.state):
+        stats["expanded"] += 1
+        for neighbor in unexplored_neighbors(current.state, explored):
             if queue.add(Node(neighbor[1], current, neighbor[0])):
                 return getPath(Node(neighbor[1], current, neighbor[0]), source)
     return None
 
+def bidirectional_path(source, target):
+    """
+    Same as shortest_path, but grows a breadth first frontier from both
+    the source and the target, one whole level at a time, and stops as
+    soon as the two searches meet.
+    """
+    # each side maps a reached person to the (movie_id, person_id) it was reached from
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    # movies whose cast has already been expanded by each side
+    forward_explored = set()
+    backward_explored = set()
+    while forward_frontier and backward_frontier:
+        # always expand the smaller side, it is the cheaper level to complete
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward, forward_explored)
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward, backward_explored)
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+    return None
+
+
+def landmark_path(source, target, landmarks):
+    """
+    Same as shortest_path, but an A* search guided by the lower bounds
+    of a LandmarkIndex. It searches from the source only, so it expands
+    far more people than bidirectional_path; landmarks.py compares them.
+    """
+    estimate = landmarks.heuristic(target)
+    # maps a reached person to its distance and the (movie_id, person_id) it was reached from
+    reached = {source: (0, None)}
+    # maps an expanded movie to the distance of the person it was expanded from
+    explored = {}
+    # entries are (estimated length, -distance, order, person_id), so that
+    # ties go to the deepest person and never compare the ids
+    queue = [(estimate(source), 0, 0, source)]
+    order = 0
+    while queue:
+        _, distance, _, person_id = heapq.heappop(queue)
+        distance = -distance
+        if distance > reached[person_id][0]:
+            # stale entry, the person was reached again by a shorter path
+            continue
+        if person_id == target:
+            return landmark_steps(reached, target)
+        stats["expanded"] += 1
+        for movie_id in people[person_id]["movies"]:
+            # the heuristic is consistent, but people are not expanded in order
+            # of distance, so a movie is only skipped if expanded from no further
+            if explored.get(movie_id, distance + 1) <= distance:
+                continue
+            explored[movie_id] = distance
+            for neighbor in movies[movie_id]["stars"]:
+                if neighbor in reached and reached[neighbor][0] <= distance + 1:
+                    continue
+                reached[neighbor] = (distance + 1, (movie_id, person_id))
+                order += 1
+                heapq.heappush(queue, (distance + 1 + estimate(neighbor), -distance - 1,
+                                       order, neighbor))
+    return None
+
+
+def landmark_steps(reached, target):
+    """
+    Follows the parents recorded by landmark_path back from the target.
+    """
+    path = []
+    person_id = target
+    while reached[person_id][1] is not None:
+        movie_id, parent = reached[person_id][1]
+        path.append((movie_id, person_id))
+        person_id = parent
+    return path[::-1]
+
+
+def expand_level(frontier, reached, other, explored):
+    """
+    Expands every person of the frontier, recording the parents of the new
+    people in reached. Returns the next frontier and the first person that
+    has already been reached by the other side (or None).
+    """
+    next_frontier = []
+    for person_id in frontier:
+        stats["expanded"] += 1
+        for movie_id, neighbor in unexplored_neighbors(person_id, explored):
+            if neighbor in reached:
+                continue
+            reached[neighbor] = (movie_id, person_id)
+            if neighbor in other:
+                # every meeting found while completing this level is a shortest path
+                return next_frontier, neighbor
+            next_frontier.append(neighbor)
+    return next_frontier, None
+
+
 def getPath(current, source):
     path = []
     while current.state != source:
@@ -125,6 +356,9 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = name_index.candidates(name, 5) if name_index is not None else []
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -157,5 +391,20 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def unexplored_neighbors(person_id, explored):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with a given
+    person in a movie that is not in explored, marking those movies as
+    explored. In a breadth first search the first expansion of a movie
+    already reaches its whole cast, so every cast is walked at most once.
+    """
+    for movie_id in people[person_id]["movies"]:
+        if movie_id in explored:
+            continue
+        explored.add(movie_id)
+        for star_id in movies[movie_id]["stars"]:
+            yield movie_id, star_id
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,109 @@
+"""
+Generates a synthetic dataset in the format of the IMDB one.
+
+Usage: python generate.py directory [--people N] [--movies N] [--seed N]
+
+Cast sizes follow a truncated power law, and the people of each cast are
+drawn with Zipf distributed popularity, so that a few people star in a
+large number of movies, as in the real data. Names are drawn from small
+lists, so that some of them are ambiguous.
+"""
+
+import argparse
+import bisect
+import csv
+import itertools
+import os
+import random
+
+FIRST_NAMES = [
+    "Anna", "Ben", "Carla", "David", "Emma", "Frank", "Grace", "Henry", "Irene",
+    "Jack", "Kate", "Luke", "Maria", "Nick", "Olivia", "Paul", "Rose", "Sam",
+    "Tom", "Uma", "Victor", "Wendy", "Xavier", "Yara", "Zoe",
+]
+LAST_NAMES = [
+    "Adams", "Baker", "Clark", "Davis", "Evans", "Fisher", "Garcia", "Hill",
+    "Irwin", "Jones", "King", "Lopez", "Miller", "Nelson", "Owen", "Parker",
+    "Quinn", "Reed", "Smith", "Turner", "Underwood", "Vega", "Walker", "Young",
+]
+WORDS = [
+    "Night", "Return", "Secret", "Last", "Dark", "City", "Love", "War", "Star",
+    "Road", "House", "River", "King", "Summer", "Dream", "Fire", "Island", "Ghost",
+]
+
+
+def cast_size(rng, alpha, smallest, largest):
+    """
+    Draws a cast size from a power law with exponent alpha, truncated
+    to [smallest, largest].
+    """
+    size = int(smallest * (1 - rng.random()) ** (-1 / (alpha - 1)))
+    return min(size, largest)
+
+
+def generate(directory, n_people, n_movies, seed=0, alpha=2.5, popularity=0.6,
+             smallest=2, largest=100):
+    """
+    Writes people.csv, movies.csv and stars.csv to directory.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # person ids are spread out like the IMDB ones
+    person_ids = rng.sample(range(1, n_people * 10), n_people)
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for person_id in person_ids:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if rng.random() < 0.5:
+                # the pairs of names alone are far too few for millions of people
+                name += f" {rng.choice(LAST_NAMES)}-{rng.randrange(1000)}"
+            birth = rng.randrange(1900, 2010) if rng.random() < 0.8 else ""
+            writer.writerow([person_id, name, birth])
+
+    movie_ids = rng.sample(range(1, n_movies * 10), n_movies)
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for movie_id in movie_ids:
+            title = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+            writer.writerow([movie_id, title, rng.randrange(1920, 2023)])
+
+    # the popularity of the person with rank r is proportional to 1 / r ** popularity
+    cumulative = list(itertools.accumulate(1 / rank ** popularity
+                                           for rank in range(1, n_people + 1)))
+    total = cumulative[-1]
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id in movie_ids:
+            size = min(cast_size(rng, alpha, smallest, largest), n_people)
+            cast = set()
+            while len(cast) < size:
+                rank = bisect.bisect_left(cumulative, rng.random() * total)
+                cast.add(person_ids[min(rank, n_people - 1)])
+            for person_id in cast:
+                writer.writerow([person_id, movie_id])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=100000)
+    parser.add_argument("--movies", type=int, default=35000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--alpha", type=float, default=2.5,
+                        help="exponent of the cast size power law")
+    parser.add_argument("--popularity", type=float, default=0.6,
+                        help="exponent of the Zipf popularity of people")
+    parser.add_argument("--min-cast", type=int, default=2)
+    parser.add_argument("--max-cast", type=int, default=100)
+    args = parser.parse_args()
+    generate(args.directory, args.people, args.movies, args.seed, args.alpha,
+             args.popularity, args.min_cast, args.max_cast)
+    print(f"Generated {args.people} people and {args.movies} movies in {args.directory}.")
+
+
+if __name__ == "__main__":
+    main()
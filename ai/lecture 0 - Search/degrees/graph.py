@@ -0,0 +1,259 @@
+"""
+Compact, integer indexed representation of the degrees dataset.
+
+People and movies are numbered densely from 0 in file order, and the
+person -> movies and movie -> stars relations are stored in CSR form:
+the neighbors of row i are targets[offsets[i]:offsets[i + 1]], all kept
+in flat machine-integer arrays instead of dicts of sets of strings.
+Loaded from a snapshot, the arrays are memoryviews over a memory map.
+The searches work only on the integer indexes; the IMDB ids, names and
+titles are looked up when a path has to be printed.
+"""
+
+import csv
+from array import array
+
+import snapshot
+from components import ComponentIndex, build_from_compact
+from util import join_paths
+
+# Attributes of CompactGraph stored in its snapshot
+SNAPSHOT_SECTIONS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+    "person_index", "movie_index", "names",
+    "person_offsets", "person_movies", "movie_offsets", "movie_stars",
+]
+COMPONENT_SECTIONS = ["component_labels", "component_sizes"]
+
+
+class CompactGraph():
+    def __init__(self):
+        # Index -> IMDB id, name and birth of each person
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+
+        # Index -> IMDB id, title and year of each movie
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+
+        # IMDB id -> index
+        self.person_index = {}
+        self.movie_index = {}
+
+        # Lowercase name -> list of person indexes
+        self.names = {}
+
+        # CSR adjacency, person -> movies and movie -> stars
+        self.person_offsets = array("l", [0])
+        self.person_movies = array("l")
+        self.movie_offsets = array("l", [0])
+        self.movie_stars = array("l")
+
+        # Connected components, indexed by person
+        self.components = None
+
+        # Counters of the last search
+        self.stats = {"expanded": 0}
+
+    @classmethod
+    def load(cls, directory, use_snapshot=True):
+        """
+        Load data from CSV files into a new compact graph.
+
+        The graph is saved to a binary snapshot next to the CSV files, and
+        later loads memory map that snapshot for as long as the CSV files
+        are unchanged.
+        """
+        if not use_snapshot:
+            return cls.from_csv(directory)
+        sources = snapshot.fingerprint(directory)
+        path = snapshot.snapshot_path(directory, "compact")
+        sections = snapshot.read(path, sources, SNAPSHOT_SECTIONS + COMPONENT_SECTIONS)
+        if sections is not None:
+            graph = cls()
+            for name in SNAPSHOT_SECTIONS:
+                setattr(graph, name, sections[name])
+            graph.components = ComponentIndex(*(sections[name] for name in COMPONENT_SECTIONS))
+            return graph
+        graph = cls.from_csv(directory)
+        sections = {name: getattr(graph, name) for name in SNAPSHOT_SECTIONS}
+        sections["component_labels"] = graph.components.labels
+        sections["component_sizes"] = graph.components.sizes
+        snapshot.write(path, sources, sections)
+        return graph
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Parses the CSV files into a new compact graph.
+        """
+        graph = cls()
+
+        # Load people
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                index = len(graph.person_ids)
+                graph.person_index[row["id"]] = index
+                graph.person_ids.append(row["id"])
+                graph.person_names.append(row["name"])
+                graph.person_births.append(row["birth"])
+                graph.names.setdefault(row["name"].lower(), []).append(index)
+
+        # Load movies
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                graph.movie_index[row["id"]] = len(graph.movie_ids)
+                graph.movie_ids.append(row["id"])
+                graph.movie_titles.append(row["title"])
+                graph.movie_years.append(row["year"])
+
+        # Load stars, each edge encoded as person * number of movies + movie
+        n_movies = len(graph.movie_ids)
+        edges = array("q")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person = graph.person_index.get(row["person_id"])
+                movie = graph.movie_index.get(row["movie_id"])
+                if person is not None and movie is not None:
+                    edges.append(person * n_movies + movie)
+
+        graph.build(sorted(set(edges)))
+        graph.components = build_from_compact(graph)
+        return graph
+
+    def build(self, edges):
+        """
+        Fills the CSR arrays from the sorted, duplicate free edge keys.
+        """
+        n_people = len(self.person_ids)
+        n_movies = len(self.movie_ids)
+
+        # Sorting by key already groups the edges by person
+        person_counts = array("l", [0]) * n_people
+        movie_counts = array("l", [0]) * n_movies
+        self.person_movies = array("l", [0]) * len(edges)
+        for i, edge in enumerate(edges):
+            person, movie = divmod(edge, n_movies)
+            self.person_movies[i] = movie
+            person_counts[person] += 1
+            movie_counts[movie] += 1
+        self.person_offsets = cumulative(person_counts)
+        self.movie_offsets = cumulative(movie_counts)
+
+        # Counting sort of the same edges by movie
+        self.movie_stars = array("l", [0]) * len(edges)
+        position = array("l", self.movie_offsets[:-1])
+        for edge in edges:
+            person, movie = divmod(edge, n_movies)
+            self.movie_stars[position[movie]] = person
+            position[movie] += 1
+
+    def movies_of(self, person):
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def person_id_for_name(self, name):
+        """
+        Returns the index of the person with the given name,
+        resolving ambiguities as needed.
+        """
+        indexes = self.names.get(name.lower(), [])
+        if len(indexes) == 0:
+            return None
+        elif len(indexes) > 1:
+            print(f"Which '{name}'?")
+            for index in indexes:
+                print(f"ID: {self.person_ids[index]}, Name: {self.person_names[index]}, "
+                      f"Birth: {self.person_births[index]}")
+            person_id = input("Intended Person ID: ")
+            index = self.person_index.get(person_id)
+            return index if index in indexes else None
+        else:
+            return indexes[0]
+
+    def shortest_path(self, source, target, bidirectional=True):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index.
+
+        If no possible path, returns None.
+        """
+        self.stats["expanded"] = 0
+        if source == target:
+            return []
+        if self.components is not None and not self.components.connected(source, target):
+            return None
+
+        # each side maps a reached person to the (movie, person) it was reached from
+        forward = {source: None}
+        backward = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+        # one flag per movie, set once its cast has been expanded by that side
+        forward_explored = bytearray(len(self.movie_ids))
+        backward_explored = bytearray(len(self.movie_ids))
+        while forward_frontier and backward_frontier:
+            if not bidirectional or len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_level(
+                    forward_frontier, forward, backward, forward_explored)
+            else:
+                backward_frontier, meeting = self.expand_level(
+                    backward_frontier, backward, forward, backward_explored)
+            if meeting is not None:
+                return join_paths(meeting, forward, backward)
+        return None
+
+    def expand_level(self, frontier, reached, other, explored):
+        """
+        Expands every person of the frontier, recording the parents of the new
+        people in reached. Returns the next frontier and the first person that
+        has already been reached by the other side (or None).
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        next_frontier = []
+        for person in frontier:
+            self.stats["expanded"] += 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if explored[movie]:
+                    continue
+                explored[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if star in reached:
+                        continue
+                    reached[star] = (movie, person)
+                    if star in other:
+                        return next_frontier, star
+                    next_frontier.append(star)
+        return next_frontier, None
+
+    def path_ids(self, path):
+        """
+        Maps a path of (movie, person) indexes back to IMDB ids.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+
+def cumulative(counts):
+    """
+    Returns the CSR offsets array for the given row counts.
+    """
+    offsets = array("l", [0])
+    total = 0
+    for count in counts:
+        total += count
+        offsets.append(total)
+    return offsets
+
@@ -0,0 +1,208 @@
+"""
+Landmark distance oracle for degrees (the ALT technique).
+
+A few well connected people are chosen as landmarks and the breadth first
+distance from each of them to every person is precomputed. By the triangle
+inequality, for any landmark L
+
+    |d(L, a) - d(L, b)| <= d(a, b) <= d(L, a) + d(L, b)
+
+which gives an instant lower and upper bound on the separation of two
+people, and an admissible heuristic for an A* search.
+
+Usage: python landmarks.py [directory] [--count N] [--queries N]
+builds the index, saves it next to the CSV files and compares how many
+people the searches expand with and without it.
+"""
+
+import argparse
+import random
+import sys
+import time
+from array import array
+
+import degrees
+import snapshot
+
+# Distance stored for the people a landmark cannot reach
+UNREACHABLE = 65535
+
+# Distance stored for the people further away, which is only a lower bound
+FARTHEST = UNREACHABLE - 1
+
+
+class LandmarkIndex():
+    def __init__(self, landmarks, index, distances):
+        # IMDB ids of the landmarks
+        self.landmarks = landmarks
+        # Maps person_ids to their position in every distances row
+        self.index = index
+        # One row per landmark, with an unsigned short per person
+        self.distances = distances
+
+    @classmethod
+    def build(cls, landmarks):
+        """
+        Runs a breadth first search from every landmark over the loaded
+        degrees dataset.
+        """
+        index = {person_id: i for i, person_id in enumerate(degrees.people)}
+        distances = [bfs_distances(landmark, index) for landmark in landmarks]
+        return cls(list(landmarks), index, distances)
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Returns the index saved for directory, or None if there is none
+        or the dataset changed since it was built.
+        """
+        sections = snapshot.read(snapshot.snapshot_path(directory, "landmarks"),
+                                 snapshot.fingerprint(directory),
+                                 ["landmarks", "index", "distance_table"])
+        if sections is None:
+            return None
+        # the rows are saved one after the other, and sliced without copying
+        table = sections["distance_table"]
+        people = len(sections["index"])
+        distances = [table[i * people:(i + 1) * people]
+                     for i in range(len(sections["landmarks"]))]
+        return cls(sections["landmarks"], sections["index"], distances)
+
+    def save(self, directory):
+        table = array("H")
+        for row in self.distances:
+            table.extend(row)
+        snapshot.write(snapshot.snapshot_path(directory, "landmarks"),
+                       snapshot.fingerprint(directory),
+                       {"landmarks": self.landmarks, "index": self.index,
+                        "distance_table": table})
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the distance from a
+        person to target.
+        """
+        position = self.index[target]
+        rows = [(row, row[position]) for row in self.distances
+                if row[position] != UNREACHABLE]
+
+        def estimate(person_id):
+            i = self.index[person_id]
+            best = 0
+            for row, to_target in rows:
+                # a person the landmark cannot reach is not connected to the target
+                best = max(best, abs(row[i] - to_target))
+            return best
+        return estimate
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        source and target. upper is None when no landmark reaches both
+        within FARTHEST, and lower is None when they are certainly not
+        connected.
+        """
+        s = self.index[source]
+        t = self.index[target]
+        lower = 0
+        upper = None
+        for row in self.distances:
+            if row[s] == UNREACHABLE and row[t] == UNREACHABLE:
+                continue
+            if row[s] == UNREACHABLE or row[t] == UNREACHABLE:
+                return None, None
+            lower = max(lower, abs(row[s] - row[t]))
+            # a capped distance is smaller than the real one
+            if row[s] == FARTHEST or row[t] == FARTHEST:
+                continue
+            if upper is None or row[s] + row[t] < upper:
+                upper = row[s] + row[t]
+        return lower, upper
+
+
+def bfs_distances(source, index):
+    """
+    Returns an array of the distances from source to every person, capped
+    at FARTHEST.
+    """
+    distances = array("H", [UNREACHABLE]) * len(index)
+    distances[index[source]] = 0
+    explored = set()
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for person_id in frontier:
+            for _, neighbor in degrees.unexplored_neighbors(person_id, explored):
+                position = index[neighbor]
+                if distances[position] == UNREACHABLE:
+                    distances[position] = min(depth, FARTHEST)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+def highest_degree(count):
+    """
+    Returns the count people with the most co-star appearances.
+    """
+    def degree(person_id):
+        return sum(len(degrees.movies[movie_id]["stars"]) - 1
+                   for movie_id in degrees.people[person_id]["movies"])
+
+    return sorted(degrees.people, key=degree, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--count", type=int, default=8, help="number of landmarks")
+    parser.add_argument("--people", help="comma separated person ids to use as landmarks")
+    parser.add_argument("--queries", type=int, default=100,
+                        help="random connected pairs used for the comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    if args.people:
+        chosen = args.people.split(",")
+    else:
+        chosen = highest_degree(args.count)
+    start = time.perf_counter()
+    index = LandmarkIndex.build(chosen)
+    index.save(args.directory)
+    print(f"Built {len(chosen)} landmarks in {time.perf_counter() - start:.2f} s.")
+
+    random.seed(args.seed)
+    candidates = sorted(person_id for person_id in degrees.people
+                        if degrees.components.component_size(person_id) > 1)
+    if not candidates:
+        sys.exit("No connected people.")
+    pairs = []
+    while len(pairs) < args.queries:
+        source, target = random.choice(candidates), random.choice(candidates)
+        if degrees.components.connected(source, target):
+            pairs.append((source, target))
+
+    modes = [
+        ("breadth first", {}),
+        ("bidirectional", {"bidirectional": True}),
+        ("landmark A*", {"landmarks": index}),
+    ]
+    for name, options in modes:
+        expanded = 0
+        start = time.perf_counter()
+        for source, target in pairs:
+            degrees.shortest_path(source, target, **options)
+            expanded += degrees.stats["expanded"]
+        seconds = time.perf_counter() - start
+        print(f"{name:14} {expanded / len(pairs):12.1f} people expanded, "
+              f"{1000 * seconds / len(pairs):8.2f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
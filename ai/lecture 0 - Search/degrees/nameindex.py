@@ -0,0 +1,200 @@
+"""
+Prefix and fuzzy search over the names of the degrees dataset.
+
+Prefix search is a binary search over the sorted array of the distinct
+lowercase names. Fuzzy search follows SymSpell: every distinct name
+prefix of PREFIX_LENGTH characters is indexed under all the strings
+obtained by deleting up to MAX_DISTANCE characters from it. A query
+prefix shares one of those keys with any prefix within MAX_DISTANCE
+edits, so only the names behind a handful of keys have their full edit
+distance computed, instead of scanning millions of names.
+
+Completion ranks the names of a prefix by popularity. The positions of
+the TOP_COMPLETIONS most popular names of every prefix shared by more
+than SCAN_LIMIT names are computed when the index is built, each from
+the lists of the prefixes one character longer, so that no completion
+ranks more than SCAN_LIMIT names.
+"""
+
+import bisect
+import heapq
+
+PREFIX_LENGTH = 8
+MAX_DISTANCE = 1
+
+# Names of a prefix ranked at completion time at most, above which its
+# TOP_COMPLETIONS most popular names are precomputed
+SCAN_LIMIT = 64
+TOP_COMPLETIONS = 10
+
+
+class NameIndex():
+    def __init__(self, sorted_names, popularity, deletes, top):
+        # Distinct lowercase names, sorted
+        self.sorted_names = sorted_names
+        # Number of movies of the people with each name, aligned with sorted_names
+        self.popularity = popularity
+        # Delete variant -> list of name prefixes it can be obtained from
+        self.deletes = deletes
+        # Prefix of more than SCAN_LIMIT names -> positions of its
+        # TOP_COMPLETIONS most popular names, most popular first
+        self.top = top
+
+    @classmethod
+    def build(cls, names, people):
+        """
+        Builds the index of the degrees names and people dicts.
+        """
+        sorted_names = sorted(names)
+        popularity = [sum(len(people[person_id]["movies"]) for person_id in names[name])
+                      for name in sorted_names]
+        deletes = {}
+        previous = None
+        for name in sorted_names:
+            prefix = name[:PREFIX_LENGTH]
+            # sorted names sharing a prefix are adjacent
+            if prefix == previous:
+                continue
+            previous = prefix
+            for variant in delete_variants(prefix, MAX_DISTANCE):
+                deletes.setdefault(variant, []).append(prefix)
+        index = cls(sorted_names, popularity, deletes, {})
+        index.rank("", 0, len(sorted_names))
+        return index
+
+    def rank(self, prefix, start, end):
+        """
+        Returns the positions of the TOP_COMPLETIONS most popular names in
+        the range of prefix, from start to end, keeping them in top for
+        every prefix in it of more than SCAN_LIMIT names.
+        """
+        if end - start <= SCAN_LIMIT:
+            return self.most_popular(range(start, end), TOP_COMPLETIONS)
+        depth = len(prefix)
+        candidates = []
+        position = start
+        # the name equal to prefix, if any, sorts first
+        while position < end and len(self.sorted_names[position]) == depth:
+            candidates.append(position)
+            position += 1
+        while position < end:
+            child = self.sorted_names[position][:depth + 1]
+            child_end = bisect.bisect_left(self.sorted_names, child + "\uffff", position, end)
+            candidates.extend(self.rank(child, position, child_end))
+            position = child_end
+        self.top[prefix] = self.most_popular(candidates, TOP_COMPLETIONS)
+        return self.top[prefix]
+
+    def prefix_range(self, prefix):
+        """
+        Returns the range of positions of the names starting with prefix.
+        """
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        # "\uffff" sorts after every character of a name
+        end = bisect.bisect_left(self.sorted_names, prefix + "\uffff", start)
+        return start, end
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to limit names starting with prefix, most popular first,
+        ties in alphabetical order.
+        """
+        prefix = prefix.lower()
+        if prefix in self.top and limit <= TOP_COMPLETIONS:
+            positions = self.top[prefix][:limit]
+        else:
+            # at most SCAN_LIMIT names, unless more than TOP_COMPLETIONS are asked for
+            positions = self.most_popular(range(*self.prefix_range(prefix)), limit)
+        return [self.sorted_names[i] for i in positions]
+
+    def most_popular(self, positions, limit):
+        """
+        Returns up to limit of positions, most popular first, ties in
+        alphabetical order.
+        """
+        return heapq.nsmallest(limit, positions, key=lambda i: (-self.popularity[i], i))
+
+    def similar(self, name, limit=10, max_distance=MAX_DISTANCE):
+        """
+        Returns up to limit (distance, name) pairs for the names within
+        max_distance edits of name, closest and most popular first.
+        """
+        name = name.lower()
+        prefixes = set()
+        for variant in delete_variants(name[:PREFIX_LENGTH], MAX_DISTANCE):
+            prefixes.update(self.deletes.get(variant, []))
+
+        found = []
+        for prefix in prefixes:
+            start, end = self.prefix_range(prefix)
+            for i in range(start, end):
+                distance = bounded_distance(name, self.sorted_names[i], max_distance)
+                if distance is not None:
+                    found.append((distance, -self.popularity[i], self.sorted_names[i]))
+        found.sort()
+        return [(distance, candidate) for distance, _, candidate in found[:limit]]
+
+    def candidates(self, text, limit=10):
+        """
+        Returns up to limit ranked names for what a user typed: the close
+        matches first, then the completions of text as a prefix.
+        """
+        result = [candidate for _, candidate in self.similar(text, limit)]
+        for candidate in self.complete(text, limit):
+            if len(result) == limit:
+                break
+            if candidate not in result:
+                result.append(candidate)
+        return result
+
+
+def delete_variants(word, distance):
+    """
+    Returns the set of strings obtained by deleting up to distance
+    characters from word, word included.
+    """
+    variants = {word}
+    current = {word}
+    for _ in range(distance):
+        current = {variant[:i] + variant[i + 1:]
+                   for variant in current for i in range(len(variant))}
+        variants |= current
+    return variants
+
+
+def bounded_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between a and b, or None if it is
+    larger than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if a == b:
+        return 0
+    if limit == 1:
+        return 1 if one_edit_apart(a, b) else None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+def one_edit_apart(a, b):
+    """
+    Checks if the different strings a and b are one insertion, deletion or
+    substitution apart, comparing slices instead of filling a DP table.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
@@ -0,0 +1,168 @@
+"""
+Long running HTTP/JSON service answering degrees queries from a dataset
+loaded once.
+
+Usage: python server.py [directory] [--host HOST] [--port PORT]
+
+Endpoints (GET):
+    /person?name=Tom Hanks           people with that name
+    /path?source=..&target=..        shortest path, by IMDB id or unambiguous name
+    /suggest?q=tom hnks              ranked names close to or starting with q
+    /health                          dataset size
+    /cache                           hit, miss and eviction counters of the tree cache
+
+Every response carries its processing time, in milliseconds, in the
+"elapsed_ms" field and in the X-Response-Time header, and is logged.
+Requests are served concurrently, one thread each; the dataset is only
+read after it is loaded.
+
+Try it with: curl "http://localhost:8000/path?source=Kevin%20Bacon&target=Tom%20Hanks"
+"""
+
+import argparse
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+from treecache import BFSTreeCache
+
+# Cache of search trees of the frequent sources, if enabled
+tree_cache = None
+
+
+def person(person_id):
+    return {
+        "id": person_id,
+        "name": degrees.people[person_id]["name"],
+        "birth": degrees.people[person_id]["birth"],
+    }
+
+
+def resolve(value):
+    """
+    Returns the person_id for an IMDB id or a name, raising LookupError
+    if there is no such person or the name is ambiguous.
+    """
+    if value in degrees.people:
+        return value
+    person_ids = sorted(degrees.names.get(value.lower(), set()))
+    if len(person_ids) == 0:
+        raise LookupError(f"Person not found: {value}")
+    elif len(person_ids) > 1:
+        raise LookupError(f"Ambiguous name {value}, use one of: {', '.join(person_ids)}")
+    return person_ids[0]
+
+
+def find_people(query):
+    name = query.get("name", [""])[0]
+    person_ids = sorted(degrees.names.get(name.lower(), set()))
+    return 200, {"name": name, "people": [person(person_id) for person_id in person_ids]}
+
+
+def find_path(query):
+    try:
+        source = resolve(query.get("source", [""])[0])
+        target = resolve(query.get("target", [""])[0])
+    except LookupError as e:
+        return 404, {"error": str(e)}
+
+    if tree_cache is not None:
+        path = tree_cache.shortest_path(source, target)
+    else:
+        path = degrees.shortest_path(source, target, bidirectional=True)
+    result = {"source": person(source), "target": person(target)}
+    if path is None:
+        result["degrees"] = None
+        return 200, result
+    result["degrees"] = len(path)
+    result["path"] = [
+        {"movie_id": movie_id, "title": degrees.movies[movie_id]["title"],
+         "person_id": person_id, "name": degrees.people[person_id]["name"]}
+        for movie_id, person_id in path
+    ]
+    return 200, result
+
+
+def suggest(query):
+    text = query.get("q", [""])[0]
+    if not text:
+        return 400, {"error": "Missing q"}
+    return 200, {"q": text, "names": degrees.name_index.candidates(text, 10)}
+
+
+def health(query):
+    return 200, {"people": len(degrees.people), "movies": len(degrees.movies)}
+
+
+def cache_stats(query):
+    if tree_cache is None:
+        return 404, {"error": "No tree cache, start the server with --tree-cache"}
+    return 200, tree_cache.counters()
+
+
+ROUTES = {
+    "/person": find_people,
+    "/path": find_path,
+    "/suggest": suggest,
+    "/health": health,
+    "/cache": cache_stats,
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        route = ROUTES.get(url.path)
+        if route is None:
+            status, result = 404, {"error": f"Unknown endpoint: {url.path}"}
+        else:
+            status, result = route(parse_qs(url.query))
+        elapsed = 1000 * (time.perf_counter() - start)
+        result["elapsed_ms"] = round(elapsed, 3)
+
+        body = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Response-Time", f"{elapsed:.3f}ms")
+        self.end_headers()
+        self.wfile.write(body)
+        self.log_message('"%s" %d %.3f ms', self.requestline, status, elapsed)
+
+    def log_request(self, code="-", size="-"):
+        # replaced by the line with the latency in do_GET
+        pass
+
+
+def main():
+    global tree_cache
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--tree-cache", type=float, metavar="MIB",
+                        help="cache the search trees of frequent sources within MIB")
+    parser.add_argument("--no-snapshot", dest="use_snapshot", action="store_false",
+                        help="always parse the CSV files")
+    args = parser.parse_args()
+    if args.tree_cache:
+        tree_cache = BFSTreeCache(int(args.tree_cache * 2 ** 20))
+
+    print("Loading data...")
+    degrees.load_data(args.directory, args.use_snapshot)
+    print("Data loaded.")
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
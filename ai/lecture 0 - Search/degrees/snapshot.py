@@ -0,0 +1,141 @@
+"""
+Binary snapshots of a loaded degrees dataset.
+
+A snapshot is written next to the CSV files and records the size and the
+modification time of each of them, so it is ignored (and rewritten) as
+soon as any source file changes. The file is laid out as
+
+    magic | header length | JSON header | sections
+
+where every section is either a marshal blob (for Python containers) or
+the raw bytes of an array, 8 byte aligned, so that arrays can be used
+straight from a memory map without copying them.
+"""
+
+import json
+import marshal
+import mmap
+import os
+import struct
+
+MAGIC = b"DEGSNAP1"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+
+def snapshot_path(directory, kind):
+    """
+    Returns the path of the snapshot of the given kind for directory.
+    """
+    return os.path.join(directory, f"degrees-{kind}.snapshot")
+
+
+def fingerprint(directory):
+    """
+    Returns the size and modification time of every source CSV file.
+    """
+    result = []
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        result.append([name, stat.st_size, stat.st_mtime_ns])
+    return result
+
+
+def write(path, sources, sections):
+    """
+    Writes sections, a dict of name -> array or marshallable object,
+    to path. The file is replaced atomically; errors (e.g. a read only
+    dataset directory) are ignored, since the snapshot is only a cache.
+    """
+    blobs = []
+    for name, value in sections.items():
+        if hasattr(value, "typecode"):
+            blobs.append((name, f"array:{value.typecode}:{value.itemsize}", value.tobytes()))
+        else:
+            blobs.append((name, "marshal", marshal.dumps(value)))
+
+    # lay the sections out first, relative to the end of the header
+    layout = []
+    offset = 0
+    for name, kind, data in blobs:
+        layout.append([name, kind, offset, len(data)])
+        offset = align(offset + len(data))
+    header = json.dumps({"sources": sources, "sections": layout}).encode()
+    start = align(len(MAGIC) + 8 + len(header))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for (name, kind, data), (_, _, section_offset, _) in zip(blobs, layout):
+                f.write(b"\0" * (start + section_offset - f.tell()))
+                f.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def read(path, sources, names):
+    """
+    Returns the dict of sections stored in path, or None if there is no
+    snapshot, it was made from different source files or it lacks any of
+    the required section names. Arrays are returned as memoryviews over a
+    read only memory map of the file.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return decode(data, sources, names)
+    except (struct.error, ValueError, KeyError, TypeError, EOFError):
+        # damaged, e.g. truncated: ignored like a missing snapshot
+        return None
+
+
+def decode(data, sources, names):
+    """
+    Returns the dict of sections of a snapshot read by read, raising
+    struct.error, ValueError, KeyError, TypeError or EOFError if it is
+    damaged.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    header_length, = struct.unpack_from("<Q", data, len(MAGIC))
+    header_end = len(MAGIC) + 8 + header_length
+    header = json.loads(bytes(data[len(MAGIC) + 8:header_end]))
+    if header["sources"] != sources:
+        return None
+    if not set(names) <= {section[0] for section in header["sections"]}:
+        # written by an older version that stored less
+        return None
+
+    start = align(header_end)
+    view = memoryview(data)
+    sections = {}
+    for name, kind, offset, length in header["sections"]:
+        section = view[start + offset:start + offset + length]
+        if len(section) != length:
+            raise ValueError(f"truncated section {name}")
+        if kind == "marshal":
+            sections[name] = marshal.loads(section)
+            continue
+        _, typecode, itemsize = kind.split(":")
+        cast = section.cast(typecode)
+        if cast.itemsize != int(itemsize):
+            # written on a platform with a different C integer size
+            return None
+        sections[name] = cast
+    return sections
+
+
+def align(offset):
+    """
+    Rounds offset up to a multiple of 8.
+    """
+    return (offset + 7) & ~7
@@ -0,0 +1,158 @@
+"""
+LRU cache of complete breadth first search trees, for query traffic where
+a few people are the source of most queries.
+
+A cached source has had a breadth first search run over its whole
+component, keeping the parent of every person reached. Any later query
+from (or, since the graph is undirected, to) that person is answered by
+walking up the tree. Trees are evicted, least recently used first, when
+their estimated size exceeds the memory budget.
+
+A whole component costs far more to search than one query, so a tree is
+only built once its source has missed admit_after times; until then the
+misses are answered with a bidirectional search, and one-off sources
+never evict the trees of the frequent ones.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import degrees
+
+# Estimated bytes of one entry of a parents dict beyond the dict itself:
+# the (movie_id, person_id) tuple, the ids are shared with the dataset
+ENTRY_SIZE = sys.getsizeof((None, None))
+
+# Sources whose misses are counted at most, before the counts are reset
+MAX_CANDIDATES = 100000
+
+
+class BFSTreeCache():
+    def __init__(self, budget, admit_after=2):
+        # Memory budget, in bytes
+        self.budget = budget
+        self.admit_after = admit_after
+        # Source -> number of misses, for the sources without a tree
+        self.candidates = {}
+        # Source -> (parents, estimated size), least recently used first
+        self.trees = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def shortest_path(self, source, target):
+        """
+        Same as degrees.shortest_path, answered from the search tree of
+        the source or of the target.
+        """
+        if source == target:
+            return []
+        if degrees.components is not None and not degrees.components.connected(source, target):
+            return None
+
+        with self.lock:
+            parents = self.lookup(source)
+            if parents is None:
+                reverse = self.lookup(target)
+                if reverse is not None:
+                    return reversed_path(walk(reverse, source), target)
+                self.misses += 1
+                admit = self.count_miss(source)
+            else:
+                return walk(parents, target)
+
+        if not admit:
+            return degrees.shortest_path(source, target, bidirectional=True)
+        parents = bfs_tree(source)
+        with self.lock:
+            self.store(source, parents)
+        return walk(parents, target)
+
+    def lookup(self, source):
+        """
+        Returns the cached tree of source, counting a hit, or None.
+        """
+        if source not in self.trees:
+            return None
+        self.trees.move_to_end(source)
+        self.hits += 1
+        return self.trees[source][0]
+
+    def count_miss(self, source):
+        """
+        Counts a miss of source, returns True if its tree should be built.
+        """
+        if len(self.candidates) >= MAX_CANDIDATES:
+            self.candidates.clear()
+        misses = self.candidates.get(source, 0) + 1
+        if misses >= self.admit_after:
+            self.candidates.pop(source, None)
+            return True
+        self.candidates[source] = misses
+        return False
+
+    def store(self, source, parents):
+        size = sys.getsizeof(parents) + ENTRY_SIZE * len(parents)
+        if size > self.budget or source in self.trees:
+            return
+        while self.used + size > self.budget:
+            _, (_, evicted) = self.trees.popitem(last=False)
+            self.used -= evicted
+            self.evictions += 1
+        self.trees[source] = (parents, size)
+        self.used += size
+
+    def counters(self):
+        with self.lock:
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "trees": len(self.trees), "bytes": self.used, "budget": self.budget,
+            }
+
+
+def bfs_tree(source):
+    """
+    Returns the dict mapping every person connected to source to the
+    (movie_id, person_id) it was first reached from, None for source.
+    """
+    parents = {source: None}
+    explored = set()
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor in degrees.unexplored_neighbors(person_id, explored):
+                if neighbor not in parents:
+                    parents[neighbor] = (movie_id, person_id)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return parents
+
+
+def walk(parents, target):
+    """
+    Returns the (movie_id, person_id) path from the root of the tree to
+    target, or None if the tree does not reach it.
+    """
+    if target not in parents:
+        return None
+    path = []
+    person_id = target
+    while parents[person_id] is not None:
+        movie_id, parent = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    return path[::-1]
+
+
+def reversed_path(path, end):
+    """
+    Turns the path from a person to end around, so that it starts at end.
+    """
+    if path is None:
+        return None
+    people = [end] + [person_id for _, person_id in path]
+    return [(path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)]
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -5,11 +8,35 @@ class Node():
         self.action = action
 
 
+def join_paths(meeting, forward, backward):
+    """
+    Builds the (movie, person) path through the person where the forward
+    and the backward searches met. forward and backward map each reached
+    person to the (movie, person) pair it was reached from, or None for
+    the two ends of the path.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, parent = backward[person_id]
+        path.append((movie_id, parent))
+        person_id = parent
+    return path
+
+
 class StackFrontier():
     def __init__(self, target):
         self.frontier = []
         self.target = target
-        self.visitedStates = []
+        # sets, so that both membership checks are constant time
+        self.visitedStates = set()
+        self.frontierStates = set()
 
     def isAlredyVisited(self, newState):
         return newState in self.visitedStates
@@ -17,12 +44,13 @@ class StackFrontier():
     def add(self, node):
         if self.isAlredyVisited(node.state):
             return False
-        self.visitedStates.append(node.state)
+        self.visitedStates.add(node.state)
+        self.frontierStates.add(node.state)
         self.frontier.append(node)
         return node.state == self.target
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.frontierStates
 
     def empty(self):
         return len(self.frontier) == 0
@@ -31,17 +59,20 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.frontierStates.discard(node.state)
             return node
 
 
 class QueueFrontier(StackFrontier):
+    def __init__(self, target):
+        super().__init__(target)
+        self.frontier = deque()
 
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.frontierStates.discard(node.state)
             return node
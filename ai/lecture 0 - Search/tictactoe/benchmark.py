@@ -0,0 +1,211 @@
+"""
+Benchmark of the tic-tac-toe AI from every reachable position.
+
+Usage: python benchmark.py [--skip-legacy]
+
+For every reachable position that is not over, the AI picks a move and
+the number of positions searched and the time taken are recorded. The
+search runs cold (empty transposition table before every move) and warm
+(table kept across moves, as during a game), and is compared with the
+original search, which copied the board at every node, and with the
+lookup in the precomputed table of perfect play.
+
+The cost of the board representation alone is measured by solving the
+whole game tree, without pruning, on the original list of lists board
+and on bitboards.
+"""
+
+import argparse
+import copy
+import time
+
+import bitboard
+import perfectplay
+import tictactoe as ttt
+
+
+def reachable_positions():
+    """
+    Returns every position reachable from the initial one that is not over.
+    """
+    positions = []
+    seen = set()
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = bitboard.to_bits(board)
+        if key in seen or ttt.terminal(board):
+            continue
+        seen.add(key)
+        positions.append(board)
+        for action in ttt.actions(board):
+            stack.append(ttt.result(copy.deepcopy(board), action))
+    return positions
+
+
+def legacy_minimax(board):
+    """
+    The original search, kept only as the baseline.
+    """
+    if board == ttt.initial_state():
+        return 0, 0
+    next = legacy_player(board)
+    moves = ttt.actions(board)
+    bestMove = None
+    for move in moves:
+        val = legacy_evaluate(board, move)
+        if next == ttt.X and val == 1:
+            return move
+        if next == ttt.O and val == -1:
+            return move
+        if val == 0:
+            bestMove = move
+    return bestMove if bestMove is not None else moves[0]
+
+
+def legacy_evaluate(board, nextMove):
+    bitboard.stats["nodes"] += 1
+    newBoard = copy.deepcopy(board)
+    newBoard[nextMove[0]][nextMove[1]] = legacy_player(board)
+    if legacy_terminal(newBoard):
+        return legacy_utility(newBoard)
+    next = legacy_player(newBoard)
+    best = -1 if next == ttt.X else 1
+    for move in ttt.actions(newBoard):
+        val = legacy_evaluate(newBoard, move)
+        if next == ttt.X:
+            if val == 1:
+                return 1
+            best = max(best, val)
+        else:
+            if val == -1:
+                return -1
+            best = min(best, val)
+    return best
+
+
+def legacy_player(board):
+    x = sum(row.count(ttt.X) for row in board)
+    o = sum(row.count(ttt.O) for row in board)
+    return ttt.X if x <= o else ttt.O
+
+
+def legacy_winner(board):
+    for row in board:
+        if row[0] is not None and row[0] == row[1] == row[2]:
+            return row[0]
+    for i in range(3):
+        if board[0][i] is not None and board[0][i] == board[1][i] == board[2][i]:
+            return board[0][i]
+    if board[0][0] is not None and board[0][0] == board[1][1] == board[2][2]:
+        return board[0][0]
+    if board[2][0] is not None and board[2][0] == board[1][1] == board[0][2]:
+        return board[2][0]
+    return None
+
+
+def legacy_terminal(board):
+    if all(cell is not None for row in board for cell in row):
+        return True
+    return legacy_winner(board) is not None
+
+
+def legacy_utility(board):
+    win = legacy_winner(board)
+    if win is None:
+        return 0
+    return 1 if win == ttt.X else -1
+
+
+def full_tree_list(board):
+    """
+    Minimax value of the board with no pruning, on the list board,
+    walking it once per node as the original functions did.
+    """
+    if legacy_terminal(board):
+        return legacy_utility(board)
+    turn = legacy_player(board)
+    values = []
+    for i, j in ttt.actions(board):
+        board[i][j] = turn
+        values.append(full_tree_list(board))
+        board[i][j] = ttt.EMPTY
+    return max(values) if turn == ttt.X else min(values)
+
+
+def full_tree_bits(mover, other):
+    """
+    Negamax value for the player to move with no pruning, on bitboards.
+    """
+    if bitboard.WINNING[other]:
+        return -1
+    free = bitboard.FULL & ~(mover | other)
+    if not free:
+        return 0
+    best = -1
+    for cell, bit in bitboard.FREE_CELLS[free]:
+        value = -full_tree_bits(other, mover | bit)
+        if value > best:
+            best = value
+    return best
+
+
+def run_full_tree():
+    start = time.perf_counter()
+    value = full_tree_list(ttt.initial_state())
+    list_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    assert full_tree_bits(0, 0) == value
+    bits_seconds = time.perf_counter() - start
+    print(f"Full tree solve: list {list_seconds:.2f} s, bitboard {bits_seconds:.2f} s, "
+          f"{list_seconds / bits_seconds:.1f}x faster")
+
+
+def search_move(board):
+    return bitboard.to_action(bitboard.best_move(*bitboard.to_bits(board)))
+
+
+def run_table(positions):
+    start = time.perf_counter()
+    perfectplay.entries = perfectplay.load()
+    loaded = perfectplay.entries is not None
+    if not loaded:
+        perfectplay.entries = perfectplay.build()
+    print(f"Perfect play table: {len(perfectplay.entries)} positions up to symmetry, "
+          f"{'loaded' if loaded else 'built'} in {time.perf_counter() - start:.3f} s")
+    run("table lookup", positions, ttt.minimax, cold=False)
+
+
+def run(name, positions, search, cold):
+    nodes = 0
+    start = time.perf_counter()
+    for board in positions:
+        if cold:
+            bitboard.transpositions.clear()
+        bitboard.stats["nodes"] = 0
+        search([row[:] for row in board])
+        nodes += bitboard.stats["nodes"]
+    seconds = time.perf_counter() - start
+    print(f"{name:22} {nodes / len(positions):10.1f} nodes/move "
+          f"{1e6 * seconds / len(positions):10.1f} us/move {seconds:8.2f} s total")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="do not run the slow original search")
+    args = parser.parse_args()
+
+    positions = reachable_positions()
+    print(f"{len(positions)} reachable positions that are not over.")
+    if not args.skip_legacy:
+        run("original", positions, legacy_minimax, cold=False)
+    run("alpha-beta, cold table", positions, search_move, cold=True)
+    bitboard.transpositions.clear()
+    run("alpha-beta, warm table", positions, search_move, cold=False)
+    run_table(positions)
+    run_full_tree()
+
+
+if __name__ == "__main__":
+    main()
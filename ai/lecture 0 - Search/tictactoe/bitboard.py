@@ -0,0 +1,163 @@
+"""
+Bitboard representation of tic-tac-toe.
+
+A position is two 9 bit ints, the cells of X and the cells of O, where
+cell (i, j) is bit 3 * i + j. A line is won when the mask of its three
+bits is contained in a player's bits, which is precomputed for all the
+512 sets of cells, and the player to move follows from the number of
+bits set on each side.
+"""
+
+X = "X"
+O = "O"
+
+SIZE = 3
+FULL = (1 << SIZE * SIZE) - 1
+
+# Masks of the 8 lines: rows, columns and the two diagonals
+LINES = (
+    [0b111 << SIZE * i for i in range(SIZE)]
+    + [0b001001001 << j for j in range(SIZE)]
+    + [0b100010001, 0b001010100]
+)
+
+# Bits of one player -> 1 if they contain a line, so a win is a single lookup
+WINNING = bytearray(any(bits & mask == mask for mask in LINES) for bits in range(FULL + 1))
+
+# Free cells mask -> (cell, bit) of every free cell, in index order
+FREE_CELLS = [[(cell, 1 << cell) for cell in range(SIZE * SIZE) if free >> cell & 1]
+              for free in range(FULL + 1)]
+
+# Cells in the order the search tries them: center, corners, edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Cell -> the move order with that cell, suggested by the transposition table, first
+HINTED_ORDER = [[cell] + [other for other in MOVE_ORDER if other != cell]
+                for cell in range(SIZE * SIZE)]
+
+# Kinds of values stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps (mover << 9 | other) to (value, kind of value, best cell) for the player to move
+transpositions = {}
+
+# Number of positions searched, for benchmarks
+stats = {"nodes": 0}
+
+
+def to_bits(board):
+    """
+    Converts a list of lists board to the (x, o) bitboards.
+    """
+    x = 0
+    o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << SIZE * i + j
+            elif cell == O:
+                o |= 1 << SIZE * i + j
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Converts the (x, o) bitboards to a list of lists board.
+    """
+    return [[X if x >> SIZE * i + j & 1 else O if o >> SIZE * i + j & 1 else None
+             for j in range(SIZE)]
+            for i in range(SIZE)]
+
+
+def to_action(cell):
+    return divmod(cell, SIZE)
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+def player(x, o):
+    return X if popcount(x) <= popcount(o) else O
+
+
+def has_line(bits):
+    return WINNING[bits] == 1
+
+
+def winner(x, o):
+    if has_line(x):
+        return X
+    if has_line(o):
+        return O
+    return None
+
+
+def terminal(x, o):
+    return (x | o) == FULL or has_line(x) or has_line(o)
+
+
+def best_move(x, o):
+    """
+    Returns the best cell for the player to move on a position that is
+    not over.
+    """
+    if player(x, o) == X:
+        return negamax(x, o, -2, 2)[1]
+    return negamax(o, x, -2, 2)[1]
+
+
+def negamax(mover, other, alpha, beta):
+    """
+    Alpha-beta search of a position that is not over, where mover has the
+    cells of the player to move. Returns (value, cell), the value being 1
+    if the mover wins, -1 if it loses and 0 on a tie with perfect play;
+    it is exact only inside the (alpha, beta) window.
+    """
+    stats["nodes"] += 1
+    key = mover << 9 | other
+    original_alpha = alpha
+    hint = None
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, bound, cell = entry
+        if (bound == EXACT
+                or (bound == LOWER and value >= beta)
+                or (bound == UPPER and value <= alpha)):
+            return value, cell
+        hint = cell
+
+    occupied = mover | other
+    free = FULL & ~occupied
+    # a single free cell, the game ends with this move
+    last = free & (free - 1) == 0
+    best = -2
+    best_cell = None
+    for cell in MOVE_ORDER if hint is None else HINTED_ORDER[hint]:
+        bit = 1 << cell
+        if occupied & bit:
+            continue
+        placed = mover | bit
+        if WINNING[placed]:
+            value = 1
+        elif last:
+            value = 0
+        else:
+            value = -negamax(other, placed, -beta, -alpha)[0]
+        if value > best:
+            best = value
+            best_cell = cell
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            break
+
+    if best <= original_alpha:
+        bound = UPPER
+    elif best >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    transpositions[key] = (best, bound, best_cell)
+    return best, best_cell
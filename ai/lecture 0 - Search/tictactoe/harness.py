@@ -0,0 +1,222 @@
+"""
+Headless harness checking the speed and the play of the tic-tac-toe AI.
+
+Usage: python harness.py [rows cols k] [--games N] [--budget S] [--seed S]
+                         [--oracle | --no-oracle]
+
+Plays the AI against itself and against a player picking random moves,
+on both sides, and checks every move the AI picks from every reachable
+position against a brute force search of the whole game tree, which
+shares no code with the AI. Reports the results of the games, the moves
+per second and the percentiles of the time taken by a move.
+
+The oracle only runs by default on boards of at most 9 cells, the larger
+ones have too many positions. The exit status is 1 if the AI picked a
+losing move or lost a game to the random player on the 3x3 board.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Harness():
+    def __init__(self, rows, cols, k, budget):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.budget = budget
+        # Seconds taken by every move of the AI
+        self.latencies = []
+
+    def ai_move(self, board):
+        start = time.perf_counter()
+        move = ttt.minimax([row[:] for row in board], self.budget, k=self.k)
+        self.latencies.append(time.perf_counter() - start)
+        return move
+
+    def play(self, players):
+        """
+        Plays a game between players, a dict mapping X and O to a function
+        returning the move on a board; returns the winner, None on a tie.
+        """
+        board = ttt.initial_state(self.rows, self.cols)
+        while not ttt.terminal(board, self.k):
+            move = players[ttt.player(board, self.k)](board)
+            if board[move[0]][move[1]] is not ttt.EMPTY:
+                raise ValueError(f"Illegal move {move}")
+            board = ttt.result(board, move, self.k)
+        return ttt.winner(board, self.k)
+
+    def report_latency(self):
+        if not self.latencies:
+            return
+        total = sum(self.latencies)
+        print(f"{len(self.latencies)} AI moves, {len(self.latencies) / total:.0f} moves/s, "
+              + ", ".join(f"p{int(100 * fraction)} {1000 * percentile(self.latencies, fraction):.3f} ms"
+                          for fraction in (0.5, 0.9, 0.99))
+              + f", max {1000 * max(self.latencies):.3f} ms")
+
+
+def random_player(generator):
+    return lambda board: generator.choice(ttt.actions(board))
+
+
+def cells(board):
+    return tuple(cell for row in board for cell in row)
+
+
+class Oracle():
+    """
+    Value of every position with perfect play, 1 if X wins, -1 if O wins
+    and 0 on a tie, by brute force over the game tree.
+    """
+
+    def __init__(self, rows, cols, k):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.values = {}
+
+    def winner(self, board):
+        for i in range(self.rows):
+            for j in range(self.cols):
+                mark = board[i][j]
+                if mark is ttt.EMPTY:
+                    continue
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    run = 1
+                    while (run < self.k and 0 <= i + di * run < self.rows
+                           and 0 <= j + dj * run < self.cols
+                           and board[i + di * run][j + dj * run] == mark):
+                        run += 1
+                    if run == self.k:
+                        return mark
+        return None
+
+    def turn(self, board):
+        marks = cells(board)
+        return ttt.X if marks.count(ttt.X) <= marks.count(ttt.O) else ttt.O
+
+    def value(self, board):
+        key = cells(board)
+        if key in self.values:
+            return self.values[key]
+        win = self.winner(board)
+        if win is not None:
+            value = 1 if win == ttt.X else -1
+        elif ttt.EMPTY not in key:
+            value = 0
+        else:
+            turn = self.turn(board)
+            values = []
+            for i, j in self.free(board):
+                board[i][j] = turn
+                values.append(self.value(board))
+                board[i][j] = ttt.EMPTY
+            value = max(values) if turn == ttt.X else min(values)
+        self.values[key] = value
+        return value
+
+    def free(self, board):
+        return [(i, j) for i in range(self.rows) for j in range(self.cols)
+                if board[i][j] is ttt.EMPTY]
+
+    def positions(self):
+        """
+        Returns every position reachable from the initial one that is not over.
+        """
+        positions = []
+        seen = set()
+        stack = [ttt.initial_state(self.rows, self.cols)]
+        while stack:
+            board = stack.pop()
+            key = cells(board)
+            if key in seen or self.winner(board) is not None or ttt.EMPTY not in key:
+                continue
+            seen.add(key)
+            positions.append(board)
+            turn = self.turn(board)
+            for i, j in self.free(board):
+                child = [row[:] for row in board]
+                child[i][j] = turn
+                stack.append(child)
+        return positions
+
+
+def check_oracle(harness, oracle):
+    """
+    Returns the number of positions where the AI picked a move worse
+    than the best one.
+    """
+    positions = oracle.positions()
+    errors = 0
+    for board in positions:
+        move = harness.ai_move(board)
+        after = [row[:] for row in board]
+        after[move[0]][move[1]] = oracle.turn(board)
+        if oracle.value(after) != oracle.value(board):
+            errors += 1
+            if errors <= 5:
+                print(f"Bad move {move} on {board}")
+    print(f"Oracle: {len(positions)} positions, {errors} bad moves.")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("shape", nargs="*", type=int, default=[3, 3, 3],
+                        metavar="rows cols k")
+    parser.add_argument("--games", type=int, default=100,
+                        help="games against the random player, on each side")
+    parser.add_argument("--budget", type=float, default=ttt.TIME_BUDGET,
+                        help="seconds per AI move on boards larger than 3x3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--oracle", dest="oracle", action="store_true", default=None)
+    parser.add_argument("--no-oracle", dest="oracle", action="store_false")
+    args = parser.parse_args()
+    if len(args.shape) != 3:
+        parser.error("the board is given as: rows cols k")
+    rows, cols, k = args.shape
+    if args.oracle is None:
+        args.oracle = rows * cols <= 9
+
+    harness = Harness(rows, cols, k, args.budget)
+    generator = random.Random(args.seed)
+    failed = False
+
+    winner = harness.play({ttt.X: harness.ai_move, ttt.O: harness.ai_move})
+    print(f"AI vs AI: {'tie' if winner is None else winner + ' wins'}.")
+
+    for side in (ttt.X, ttt.O):
+        other = ttt.O if side == ttt.X else ttt.X
+        results = {side: 0, other: 0, None: 0}
+        for _ in range(args.games):
+            results[harness.play({side: harness.ai_move, other: random_player(generator)})] += 1
+        print(f"AI as {side} vs random: {results[side]} won, {results[None]} tied, "
+              f"{results[other]} lost.")
+        if (rows, cols, k) == (3, 3, 3) and results[other]:
+            failed = True
+
+    harness.report_latency()
+
+    if args.oracle:
+        harness.latencies = []
+        if check_oracle(harness, Oracle(rows, cols, k)):
+            failed = True
+        harness.report_latency()
+
+    ttt.close_parallel_searches()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
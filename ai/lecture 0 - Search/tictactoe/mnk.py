@@ -0,0 +1,232 @@
+"""
+Tic-tac-toe generalized to boards of any number of rows and columns, won
+by the first player with k cells in a row (an m,n,k-game).
+
+A position is two ints of rows * cols bits, the cells of X and of O,
+where cell (i, j) is bit cols * i + j, as in bitboard.py. Boards beyond
+3x3 are too large to search to the end, so the AI searches with
+iterative deepening: alpha-beta to depth 1, 2, ... with a heuristic
+evaluation at the leaves, until the time budget runs out, and plays the
+best move of the deepest search it completed.
+"""
+
+import threading
+import time
+
+import bitboard
+
+X = "X"
+O = "O"
+
+# Value of a won position, less the number of cells taken, so that
+# faster wins are preferred and the value depends only on the position
+WIN = 10 ** 12
+
+# Entries of the transposition table after which it is emptied
+MAX_TRANSPOSITIONS = 2000000
+
+# Positions searched between two looks at the clock
+CLOCK_INTERVAL = 256
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+    def __init__(self, rows, cols, k):
+        if not 0 < k <= max(rows, cols):
+            raise ValueError(f"Cannot get {k} in a row on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+
+        # Masks of the k cells of every line, in the 4 directions
+        self.lines = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.lines.append(sum(1 << cols * (i + di * step) + j + dj * step
+                                              for step in range(k)))
+        # Cell -> masks of the lines through it, the only ones a move there can complete
+        self.lines_through = [[mask for mask in self.lines if mask >> cell & 1]
+                              for cell in range(self.cells)]
+        # Cells in the order the search tries them: closest to the center first
+        self.order = sorted(range(self.cells), key=lambda cell: (
+            abs(2 * (cell // cols) - (rows - 1)) + abs(2 * (cell % cols) - (cols - 1)), cell))
+        # Score of a line holding n cells of one player only
+        self.weights = [0] + [4 ** n for n in range(1, k)]
+
+        # Maps (mover << cells | other) to (depth, value, kind of value, best cell)
+        self.transpositions = {}
+        self.nodes = 0
+        self.deadline = None
+        # Set by cancel, from another thread, until resume is called
+        self.cancelled = threading.Event()
+
+    def to_bits(self, board):
+        x = 0
+        o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << self.cols * i + j
+                elif cell == O:
+                    o |= 1 << self.cols * i + j
+        return x, o
+
+    def to_action(self, cell):
+        return divmod(cell, self.cols)
+
+    def player(self, x, o):
+        return X if bin(x).count("1") <= bin(o).count("1") else O
+
+    def has_line(self, bits):
+        return any(bits & mask == mask for mask in self.lines)
+
+    def completes(self, bits, cell):
+        """
+        Returns True if bits, which has just taken cell, contain a line.
+        """
+        return any(bits & mask == mask for mask in self.lines_through[cell])
+
+    def winner(self, x, o):
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, x, o):
+        return (x | o) == self.full or self.has_line(x) or self.has_line(o)
+
+    def evaluate(self, mover, other):
+        """
+        Heuristic value of a position for the player to move: every line
+        still open to only one player counts for that player, the more of
+        its cells they hold the more.
+        """
+        score = 0
+        weights = self.weights
+        for mask in self.lines:
+            mine = mover & mask
+            theirs = other & mask
+            if mine and not theirs:
+                score += weights[bin(mine).count("1")]
+            elif theirs and not mine:
+                score -= weights[bin(theirs).count("1")]
+        return score
+
+    def cancel(self):
+        """
+        Stops a search running in another thread at its next look at the
+        clock, as if its time was up, and every search started before
+        resume is called, so that a search is cancelled even if it has not
+        started yet.
+        """
+        self.cancelled.set()
+
+    def resume(self):
+        """
+        Lets the next searches run after a cancel; called before starting
+        one, never while one is running.
+        """
+        self.cancelled.clear()
+
+    def best_move(self, x, o, budget=None, max_depth=None):
+        """
+        Returns (cell, depth) for the player to move on a position that is
+        not over: the best cell found by the deepest search completed
+        within budget seconds (no limit if None), and that depth, 0 if
+        the search was cancelled before completing any.
+        """
+        mover, other = (x, o) if self.player(x, o) == X else (o, x)
+        free = self.full & ~(x | o)
+        remaining = bin(free).count("1")
+        if max_depth is None or max_depth > remaining:
+            max_depth = remaining
+        if len(self.transpositions) > MAX_TRANSPOSITIONS:
+            self.transpositions.clear()
+
+        self.deadline = None if budget is None else time.perf_counter() + budget
+        best_cell = next(cell for cell in self.order if free >> cell & 1)
+        completed = 0
+        for depth in range(1, max_depth + 1):
+            if self.cancelled.is_set():
+                break
+            try:
+                value, cell = self.negamax(mover, other, depth, -WIN - 1, WIN + 1)
+            except Timeout:
+                break
+            best_cell = cell
+            completed = depth
+            # the game is decided whatever the deeper searches would find
+            if abs(value) > WIN - self.cells - 1:
+                break
+        self.deadline = None
+        return best_cell, completed
+
+    def negamax(self, mover, other, depth, alpha, beta):
+        """
+        Alpha-beta search of a position that is not over to the given
+        depth, where mover has the cells of the player to move. Returns
+        (value, cell) for the player to move; it is exact only inside the
+        (alpha, beta) window. Raises Timeout once the deadline is past or
+        the search is cancelled.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and (
+                self.cancelled.is_set()
+                or self.deadline is not None and time.perf_counter() > self.deadline):
+            raise Timeout
+
+        key = mover << self.cells | other
+        original_alpha = alpha
+        hint = None
+        entry = self.transpositions.get(key)
+        if entry is not None:
+            stored_depth, value, bound, cell = entry
+            if stored_depth >= depth and (
+                    bound == bitboard.EXACT
+                    or (bound == bitboard.LOWER and value >= beta)
+                    or (bound == bitboard.UPPER and value <= alpha)):
+                return value, cell
+            hint = cell
+
+        occupied = mover | other
+        best = -WIN - 1
+        best_cell = None
+        order = self.order if hint is None else [hint] + [c for c in self.order if c != hint]
+        for cell in order:
+            bit = 1 << cell
+            if occupied & bit:
+                continue
+            placed = mover | bit
+            if self.completes(placed, cell):
+                value = WIN - bin(placed | other).count("1")
+            elif placed | other == self.full:
+                value = 0
+            elif depth == 1:
+                value = -self.evaluate(other, placed)
+            else:
+                value = -self.negamax(other, placed, depth - 1, -beta, -alpha)[0]
+            if value > best:
+                best = value
+                best_cell = cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best <= original_alpha:
+            bound = bitboard.UPPER
+        elif best >= beta:
+            bound = bitboard.LOWER
+        else:
+            bound = bitboard.EXACT
+        self.transpositions[key] = (depth, best, bound, best_cell)
+        return best, best_cell
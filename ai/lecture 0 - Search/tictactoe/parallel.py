@@ -0,0 +1,213 @@
+"""
+Root split parallel search for the m,n,k-games of mnk.py.
+
+Usage: python parallel.py [rows cols k] [--workers N] [--depth D] [--moves M]
+
+The moves at the root are searched by a pool of processes, each with its
+own mnk.Game and transposition table. The best value found so far at the
+root (alpha) is shared by all of them: a worker reads it before
+searching a move, so later moves are searched with the window narrowed by
+the moves already finished, and raises it when it finds a better move.
+As in serial iterative deepening, the search goes one depth deeper at a
+time, the best move of the previous depth is searched first and alone so
+that the others start from its value, and the best move of the deepest
+depth completed within the time budget is played.
+
+With a single worker, or where no pool can be started, the search falls
+back to the serial mnk.Game.best_move, which always picks the same move.
+
+Run as a script, it searches a few positions to a fixed depth with 1 to
+N workers and reports the time taken and the speedup.
+"""
+
+import argparse
+import multiprocessing
+import time
+
+import mnk
+
+# Game of the worker process and the alpha shared by all the workers
+game = None
+shared_alpha = None
+
+
+def start_worker(rows, cols, k, alpha):
+    global game, shared_alpha
+    game = mnk.Game(rows, cols, k)
+    shared_alpha = alpha
+
+
+def search_root_move(task):
+    """
+    Returns (cell, value, exact) for one move at the root, searched to
+    depth, or (cell, None, False) if the deadline (time.time()) was hit.
+    The value is exact only if it beat the shared alpha; otherwise it is
+    only an upper bound of the value of the move.
+    """
+    mover, other, cell, depth, deadline = task
+    # as in mnk.Game.best_move, which the workers never call
+    if len(game.transpositions) > mnk.MAX_TRANSPOSITIONS:
+        game.transpositions.clear()
+    alpha = shared_alpha.value
+    if deadline is not None:
+        if time.time() > deadline:
+            return cell, None, False
+        game.deadline = time.perf_counter() + deadline - time.time()
+    try:
+        value = root_move_value(game, mover, other, cell, depth, alpha)
+    except mnk.Timeout:
+        return cell, None, False
+    finally:
+        game.deadline = None
+    with shared_alpha.get_lock():
+        if value > shared_alpha.value:
+            shared_alpha.value = value
+    return cell, value, value > alpha
+
+
+def root_move_value(game, mover, other, cell, depth, alpha):
+    placed = mover | 1 << cell
+    if game.completes(placed, cell):
+        return mnk.WIN - bin(placed | other).count("1")
+    if placed | other == game.full:
+        return 0
+    if depth == 1:
+        return -game.evaluate(other, placed)
+    return -game.negamax(other, placed, depth - 1, -mnk.WIN - 1, -alpha)[0]
+
+
+class ParallelSearch():
+    def __init__(self, rows, cols, k, workers):
+        self.game = mnk.Game(rows, cols, k)
+        self.workers = workers
+        self.pool = None
+        if workers > 1:
+            try:
+                context = multiprocessing.get_context()
+                self.alpha = context.Value("q", 0)
+                self.pool = context.Pool(workers, start_worker, (rows, cols, k, self.alpha))
+            except OSError:
+                # no shared memory or processes here, search serially
+                self.pool = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def best_move(self, x, o, budget=None, max_depth=None):
+        """
+        Same as mnk.Game.best_move, with the root moves searched in parallel.
+        """
+        if self.pool is None:
+            return self.game.best_move(x, o, budget, max_depth)
+
+        mover, other = (x, o) if self.game.player(x, o) == mnk.X else (o, x)
+        free = self.game.full & ~(x | o)
+        moves = [cell for cell in self.game.order if free >> cell & 1]
+        if max_depth is None or max_depth > len(moves):
+            max_depth = len(moves)
+        deadline = None if budget is None else time.time() + budget
+
+        best_cell = moves[0]
+        completed = 0
+        for depth in range(1, max_depth + 1):
+            if deadline is not None and time.time() > deadline:
+                break
+            result = self.search_depth(mover, other, moves, depth, deadline)
+            if result is None:
+                break
+            value, best_cell = result
+            completed = depth
+            # the best move is searched first at the next depth
+            moves.remove(best_cell)
+            moves.insert(0, best_cell)
+            if abs(value) > mnk.WIN - self.game.cells - 1:
+                break
+        return best_cell, completed
+
+    def search_depth(self, mover, other, moves, depth, deadline):
+        """
+        Returns (value, cell) of the best of moves searched to depth, or
+        None if the deadline was hit. Of the moves with the best value,
+        the one earliest in moves is picked.
+        """
+        self.alpha.value = -mnk.WIN - 1
+        first = self.pool.apply(search_root_move, ((mover, other, moves[0], depth, deadline),))
+        tasks = [(mover, other, cell, depth, deadline) for cell in moves[1:]]
+        results = [first] + list(self.pool.imap_unordered(search_root_move, tasks))
+        if any(value is None for _, value, _ in results):
+            return None
+        rank = {cell: index for index, cell in enumerate(moves)}
+        value, _, cell = max((value, -rank[cell], cell)
+                             for cell, value, exact in results if exact)
+        return value, cell
+
+
+def opening_positions(game, moves):
+    """
+    Returns (x, o) positions after each of the first moves of a game the
+    serial search plays against itself at depth 2.
+    """
+    positions = []
+    x = o = 0
+    for _ in range(moves):
+        positions.append((x, o))
+        cell, _ = game.best_move(x, o, max_depth=2)
+        if game.player(x, o) == mnk.X:
+            x |= 1 << cell
+        else:
+            o |= 1 << cell
+        if game.terminal(x, o):
+            break
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("shape", nargs="*", type=int, default=[4, 4, 3],
+                        metavar="rows cols k")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--moves", type=int, default=4,
+                        help="number of positions searched, from the opening")
+    args = parser.parse_args()
+    if len(args.shape) != 3:
+        parser.error("the board is given as: rows cols k")
+    rows, cols, k = args.shape
+
+    positions = opening_positions(mnk.Game(rows, cols, k), args.moves)
+    print(f"{rows}x{cols} board, {k} in a row, {len(positions)} positions "
+          f"searched to depth {args.depth}, {multiprocessing.cpu_count()} CPUs.")
+    baseline = None
+    values = None
+    for workers in range(1, args.workers + 1):
+        with ParallelSearch(rows, cols, k, workers) as search:
+            start = time.perf_counter()
+            moves = [search.best_move(x, o, max_depth=args.depth) for x, o in positions]
+            seconds = time.perf_counter() - start
+        # every number of workers must find moves of the same value
+        game = mnk.Game(rows, cols, k)
+        found = [move_value(game, x, o, cell, args.depth) for (x, o), (cell, _) in zip(positions, moves)]
+        if values is None:
+            values = found
+        agrees = "yes" if found == values else "NO"
+        baseline = baseline or seconds
+        print(f"{workers:3} workers {seconds:8.2f} s {baseline / seconds:6.2f}x "
+              f"same values as 1 worker: {agrees}")
+
+
+def move_value(game, x, o, cell, depth):
+    mover, other = (x, o) if game.player(x, o) == mnk.X else (o, x)
+    return root_move_value(game, mover, other, cell, depth, -mnk.WIN - 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Precomputed perfect play for tic-tac-toe.
+
+Every reachable position that is not over is solved once, and only one
+position of each class of the 8 symmetries of the board (4 rotations,
+each optionally mirrored) is kept: the one with the smallest key. The
+best move and the value of every kept position are saved to a compact
+file next to this module, built the first time a move is asked for, so
+that later moves are a single lookup.
+
+File layout: MAGIC, the number of positions n, then n sorted keys
+(x | o << 9, 4 bytes each) and n bytes of (value + 1) << 4 | best cell.
+"""
+
+import os
+import struct
+from array import array
+
+import bitboard
+
+MAGIC = b"TTTPLAY1"
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfect_play.table")
+
+SIZE = bitboard.SIZE
+CELLS = SIZE * SIZE
+
+
+def rotate(cell):
+    i, j = divmod(cell, SIZE)
+    return j * SIZE + (SIZE - 1 - i)
+
+
+def mirror(cell):
+    i, j = divmod(cell, SIZE)
+    return i * SIZE + (SIZE - 1 - j)
+
+
+def symmetries():
+    """
+    Returns the 8 symmetries as permutations: cell -> transformed cell.
+    """
+    result = []
+    permutation = list(range(CELLS))
+    for _ in range(4):
+        result.append(permutation)
+        result.append([mirror(cell) for cell in permutation])
+        permutation = [rotate(cell) for cell in permutation]
+    return result
+
+
+SYMMETRIES = symmetries()
+
+# Inverse of every symmetry: transformed cell -> cell
+INVERSES = [[permutation.index(cell) for cell in range(CELLS)] for permutation in SYMMETRIES]
+
+# Symmetry -> bits -> transformed bits, for all the 512 sets of cells
+TRANSFORMS = [
+    [sum(1 << permutation[cell] for cell in range(CELLS) if bits >> cell & 1)
+     for bits in range(bitboard.FULL + 1)]
+    for permutation in SYMMETRIES
+]
+
+# Canonical key -> (value for the player to move, best cell), loaded on first use
+entries = None
+
+
+def canonical(x, o):
+    """
+    Returns (key, symmetry) of the representative of the position's class,
+    the symmetry being the index of the one that maps the position onto it.
+    """
+    return min((transform[x] | transform[o] << CELLS, index)
+               for index, transform in enumerate(TRANSFORMS))
+
+
+def best_move(x, o):
+    """
+    Returns the best cell for the player to move on a position that is
+    not over.
+    """
+    return lookup(x, o)[1]
+
+
+def value(x, o):
+    """
+    Returns the value of a position that is not over for the player to move.
+    """
+    return lookup(x, o)[0]
+
+
+def lookup(x, o):
+    """
+    Returns (value, best cell) of a position that is not over. Positions
+    no game reaches (such as O having moved first) are not in the table
+    and are searched instead.
+    """
+    global entries
+    if entries is None:
+        entries = load() or build()
+    key, symmetry = canonical(x, o)
+    if key not in entries:
+        if bitboard.player(x, o) == bitboard.X:
+            return bitboard.negamax(x, o, -2, 2)
+        return bitboard.negamax(o, x, -2, 2)
+    value, cell = entries[key]
+    return value, INVERSES[symmetry][cell]
+
+
+def build():
+    """
+    Solves every reachable position that is not over, keeping one per
+    class of symmetric positions, and saves them.
+    """
+    solved = {}
+    stack = [(0, 0)]
+    seen = set()
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen or bitboard.terminal(x, o):
+            continue
+        seen.add((x, o))
+        key, _ = canonical(x, o)
+        if key not in solved:
+            canonical_x = key & bitboard.FULL
+            canonical_o = key >> CELLS
+            if bitboard.player(canonical_x, canonical_o) == bitboard.X:
+                solved[key] = bitboard.negamax(canonical_x, canonical_o, -2, 2)
+            else:
+                solved[key] = bitboard.negamax(canonical_o, canonical_x, -2, 2)
+        x_to_move = bitboard.player(x, o) == bitboard.X
+        free = bitboard.FULL & ~(x | o)
+        for _, bit in bitboard.FREE_CELLS[free]:
+            stack.append((x | bit, o) if x_to_move else (x, o | bit))
+    save(solved)
+    return solved
+
+
+def save(solved):
+    keys = array("I", sorted(solved))
+    moves = bytes((solved[key][0] + 1) << 4 | solved[key][1] for key in keys)
+    try:
+        with open(PATH, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(keys)))
+            f.write(keys.tobytes())
+            f.write(moves)
+    except OSError:
+        # a read only install just keeps the table in memory
+        pass
+
+
+def load():
+    """
+    Returns the saved table, or None if there is none or it is unreadable.
+    """
+    try:
+        with open(PATH, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    try:
+        count, = struct.unpack_from("<I", data, len(MAGIC))
+        start = len(MAGIC) + 4
+        keys = array("I")
+        keys.frombytes(data[start:start + 4 * count])
+    except (struct.error, ValueError):
+        return None
+    moves = data[start + 4 * count:start + 5 * count]
+    if len(keys) != count or len(moves) != count:
+        return None
+    return {key: ((move >> 4) - 1, move & 0xF) for key, move in zip(keys, moves)}
@@ -1,9 +1,16 @@
 import pygame
 import sys
+import threading
 import time
+import traceback
 
 import tictactoe as ttt
 
+# Usage: python runner.py [rows cols k], 3 3 3 by default
+if len(sys.argv) not in [1, 4]:
+    sys.exit("Usage: python runner.py [rows cols k]")
+rows, cols, k = (int(arg) for arg in sys.argv[1:]) if len(sys.argv) == 4 else (3, 3, 3)
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -17,15 +24,81 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Frames drawn per second, also while the AI is thinking
+fps = 30
+
+# Seconds the AI's move is shown as pending at least, as the original delay did
+ai_delay = 0.5
+
+
+class AIMove():
+    """
+    The AI's move on a board, computed in a background thread so that the
+    window keeps drawing and handling events meanwhile.
+    """
+
+    def __init__(self, board, k):
+        self.board = [row[:] for row in board]
+        self.k = k
+        self.start = time.time()
+        self.move = None
+        # The exception the search raised, if it failed
+        self.error = None
+        self.done = False
+        # the previous search has stopped, a cancel of it must not stop this one
+        game = ttt.game(self.board, self.k)
+        if game is not None:
+            game.resume()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            self.move = ttt.minimax(self.board, k=self.k)
+        except Exception as error:
+            traceback.print_exc()
+            self.error = error
+        self.done = True
+
+    def elapsed(self):
+        return time.time() - self.start
+
+    def ready(self):
+        return self.done and self.elapsed() >= ai_delay
+
+    def cancel(self):
+        # the 3x3 board is a table lookup, searches of larger boards stop early
+        game = ttt.game(self.board, self.k)
+        if game is not None:
+            game.cancel()
+
+
+clock = pygame.time.Clock()
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = ttt.initial_state(rows, cols)
+ai_move = None
+# the last search, which may still be stopping after a cancel
+ai_search = None
+# Message shown on the choice of player after the AI failed to move
+ai_error = None
+
+
+def cancel_ai():
+    global ai_move
+    if ai_move is not None:
+        ai_move.cancel()
+        ai_move = None
+
 
 while True:
+    cancel = False
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            ttt.close_parallel_searches()
             sys.exit()
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            cancel = True
 
     screen.fill(black)
 
@@ -38,6 +111,12 @@ while True:
         titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
 
+        if ai_error is not None:
+            error = mediumFont.render(ai_error, True, white)
+            errorRect = error.get_rect()
+            errorRect.center = ((width / 2), 120)
+            screen.blit(error, errorRect)
+
         # Draw buttons
         playXButton = pygame.Rect((width / 8), (height / 2), width / 4, 50)
         playX = mediumFont.render("Play as X", True, black)
@@ -60,20 +139,22 @@ while True:
             if playXButton.collidepoint(mouse):
                 time.sleep(0.2)
                 user = ttt.X
+                ai_error = None
             elif playOButton.collidepoint(mouse):
                 time.sleep(0.2)
                 user = ttt.O
+                ai_error = None
 
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_size = min(80, 240 // max(rows, cols))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -82,25 +163,27 @@ while True:
                 pygame.draw.rect(screen, white, rect, 3)
 
                 if board[i][j] != ttt.EMPTY:
-                    move = moveFont.render(board[i][j], True, white)
+                    move = (moveFont if tile_size == 80 else mediumFont).render(board[i][j], True, white)
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
                     screen.blit(move, moveRect)
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = ttt.terminal(board, k)
+        player = ttt.player(board, k)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = ttt.winner(board, k)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
                 title = f"Game Over: {winner} wins."
         elif user == player:
             title = f"Play as {user}"
+        elif ai_move is not None:
+            title = f"Computer thinking... {ai_move.elapsed():.1f} s"
         else:
             title = f"Computer thinking..."
         title = largeFont.render(title, True, white)
@@ -108,24 +191,46 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, started once the previous search has stopped
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                if ai_search is None or not ai_search.thread.is_alive():
+                    ai_move = ai_search = AIMove(board, k)
+            elif ai_move.ready() and ai_move.error is not None:
+                # back to the choice of player, the game cannot go on
+                ai_error = f"Computer failed: {type(ai_move.error).__name__}"
+                ai_move = None
+                user = None
+                board = ttt.initial_state(rows, cols)
+            elif ai_move.ready():
+                board = ttt.result(board, ai_move.move, k)
+                ai_move = None
+
+        # While the AI is thinking, it can be cancelled, back to the choice of player
+        if ai_move is not None:
+            cancelButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+            cancelText = mediumFont.render("Cancel (Esc)", True, black)
+            cancelRect = cancelText.get_rect()
+            cancelRect.center = cancelButton.center
+            pygame.draw.rect(screen, white, cancelButton)
+            screen.blit(cancelText, cancelRect)
+            click, _, _ = pygame.mouse.get_pressed()
+            if click == 1 and cancelButton.collidepoint(pygame.mouse.get_pos()):
+                cancel = True
+            if cancel:
+                time.sleep(0.2)
+                cancel_ai()
+                user = None
+                board = ttt.initial_state(rows, cols)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                        board = ttt.result(board, (i, j), k)
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
@@ -140,7 +245,7 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = ttt.initial_state(rows, cols)
 
     pygame.display.flip()
+    clock.tick(fps)
@@ -2,29 +2,58 @@
 Tic Tac Toe Player
 """
 
-import copy
+import bitboard
+import mnk
+import parallel
+import perfectplay
 
-X = "X"
-O = "O"
+X = bitboard.X
+O = bitboard.O
 EMPTY = None
 
+# The functions taking a board also take k, the number of cells in a row
+# needed to win, 3 by default as on the 3x3 board
 
-def initial_state():
+# Seconds the AI may think about a move on boards larger than 3x3
+TIME_BUDGET = 1.0
+
+# (rows, cols, k) -> mnk.Game, for the boards larger than 3x3
+games = {}
+
+# (rows, cols, k, workers) -> parallel.ParallelSearch, kept between moves
+parallel_searches = {}
+
+
+def game(board, k=3):
+    """
+    Returns the mnk.Game for the size of the board and k in a row, or None
+    for the 3x3 game with 3 in a row, which has its own faster functions.
+    """
+    rows = len(board)
+    cols = len(board[0])
+    if rows == cols == k == bitboard.SIZE:
+        return None
+    if (rows, cols, k) not in games:
+        games[(rows, cols, k)] = mnk.Game(rows, cols, k)
+    return games[(rows, cols, k)]
+
+
+def initial_state(rows=3, cols=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
 
 
-def player(board):
+def player(board, k=3):
     """
     Returns player who has the next turn on a board.
     """
     # considering it is not important if the game it is over i avoid to check it for efficiency
-    x, o = countNumberOfMoves(board)
-    return X if x <= o else O
+    current = game(board, k)
+    if current is None:
+        return bitboard.player(*bitboard.to_bits(board))
+    return current.player(*current.to_bits(board))
 
 
 def actions(board):
@@ -33,112 +62,88 @@ def actions(board):
     """
     # considering it is not important if the game it is over i avoid to check it for efficiency
     moves = []
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] is None:
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell is None:
                 moves.append((i, j))
     return moves
 
 
-def result(board, action):
+def result(board, action, k=3):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    if terminal(board):
+    if terminal(board, k):
         return None
-    board[action[0]][action[1]] = player(board)
+    board[action[0]][action[1]] = player(board, k)
     return board
 
 
-def winner(board):
+def winner(board, k=3):
     """
     Returns the winner of the game, if there is one.
     """
-    # checking the rows
-    for row in board:
-        if row[0] is None:
-            continue
-        if row[0] == row[1] and row[1] == row[2]:
-            return row[0]
-    # checking the columns
-    for i in range(3):
-        if board[0][i] is None:
-            continue
-        if board[0][i] == board[1][i] and board[1][i] == board[2][i]:
-            return board[0][i]
-    # checking the diagonals
-    if board[0][0] is not None and board[0][0] == board[1][1] and board[1][1] == board[2][2]:
-        return board[0][0]
-    if board[2][0] is not None and board[2][0] == board[1][1] and board[1][1] == board[0][2]:
-        return board[2][0]
-    return None
-
-
-def terminal(board):
+    current = game(board, k)
+    if current is None:
+        return bitboard.winner(*bitboard.to_bits(board))
+    return current.winner(*current.to_bits(board))
+
+
+def terminal(board, k=3):
     """
     Returns True if game is over, False otherwise.
     """
-    full = True
-    for row in board:
-        for cell in row:
-            if cell is None:
-                full = False
-    if full:
-        return True
-    return winner(board) is not None
+    current = game(board, k)
+    if current is None:
+        return bitboard.terminal(*bitboard.to_bits(board))
+    return current.terminal(*current.to_bits(board))
 
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    win = winner(board)
+    win = winner(board, k)
     if win is None:
         return 0
     return 1 if win == X else -1
 
 
-def minimax(board):
+def minimax(board, budget=TIME_BUDGET, workers=1, k=3):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action for the current player on the board,
+    looked up in the precomputed table of perfect play, or searched with
+    bitboard.best_move for the boards no game reaches. On larger boards
+    returns the best action found within budget seconds (None for no
+    limit) by iterative deepening, with the moves searched by that many
+    worker processes.
     """
-    if board == initial_state():
-        return 0,0
-    if terminal(board):
+    current = game(board, k)
+    if current is None:
+        x, o = bitboard.to_bits(board)
+        if bitboard.terminal(x, o):
+            return None
+        return bitboard.to_action(perfectplay.best_move(x, o))
+    x, o = current.to_bits(board)
+    if current.terminal(x, o):
         return None
-    next = player(board)
-    moves = actions(board)
-    bestMove = None
-    for move in moves:
-        val = evaluateMoves(board, move)
-        if next == X and val == 1:
-            return move
-        if next == O and val == -1:
-            return move
-        if val == 0:
-            bestMove = move
-    return bestMove if bestMove is not None else moves[0]
-
-
-def evaluateMoves(board, nextMove):
-    newBoard = result(copy.deepcopy(board), nextMove)
-    if terminal(newBoard):
-        return utility(newBoard)
-    next = player(newBoard)
-    moves = actions(newBoard)
-    # I will consider X as a max player and O as min player
-    best = -1 if next == X else 1
-    for move in moves:
-        val = evaluateMoves(newBoard, move)
-        if next == X:
-            if val == 1:
-                return 1
-            best = max(best, val)
-        else:
-            if val == -1:
-                return -1
-            best = min(best, val)
-    return best
+    if workers > 1:
+        key = (current.rows, current.cols, current.k, workers)
+        if key not in parallel_searches:
+            parallel_searches[key] = parallel.ParallelSearch(*key)
+        cell, _ = parallel_searches[key].best_move(x, o, budget)
+    else:
+        cell, _ = current.best_move(x, o, budget)
+    return current.to_action(cell)
+
+
+def close_parallel_searches():
+    """
+    Stops the worker processes of the parallel searches kept between moves.
+    """
+    for search in parallel_searches.values():
+        search.close()
+    parallel_searches.clear()
 
 
 def countNumberOfMoves(board):
@@ -0,0 +1,197 @@
+"""
+Benchmark of model_check on the knowledge bases of puzzle.py.
+
+Usage: python benchmark.py [--repeat N] [--people N] [--symbols N]
+                           [--sentences N] [--seed S]
+
+Every puzzle is solved asking model_check about each of the six symbols,
+with every method, or model_check_many about all of them at once (method
+"many", as puzzle.main does), and the time per puzzle is
+compared with the original recursive enumeration, on the knowledge bases
+as built and interned.
+
+The search of partial models (method "partial") is then reported on the
+puzzles and on a generated puzzle with many more people: the nodes it
+visited and the branches it cut, against the nodes of the full search.
+
+Last, every method is cross-validated against the recursive enumeration
+on random knowledge bases, and timed on chains of implications of
+growing length, the longest solved by the DPLL solver of sat.py only.
+"""
+
+import argparse
+import random
+import time
+
+import logic
+import puzzle
+
+PUZZLES = [
+    ("Puzzle 0", puzzle.knowledge0),
+    ("Puzzle 1", puzzle.knowledge1),
+    ("Puzzle 2", puzzle.knowledge2),
+    ("Puzzle 3", puzzle.knowledge3),
+]
+
+SYMBOLS = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight, puzzle.BKnave,
+           puzzle.CKnight, puzzle.CKnave]
+
+
+def solve(knowledge, method, symbols=SYMBOLS):
+    if method == "many":
+        entailed = logic.model_check_many(knowledge, symbols)
+        return [symbol for symbol in symbols if entailed[symbol]]
+    return [symbol for symbol in symbols if logic.model_check(knowledge, symbol, method=method)]
+
+
+def generated_puzzle(people, generator):
+    """
+    Returns (knowledge, symbols) of a puzzle where each of people, who is
+    either a knight or a knave, says something about two others.
+    """
+    knights = [logic.Symbol(f"{i} is a Knight") for i in range(people)]
+    knaves = [logic.Symbol(f"{i} is a Knave") for i in range(people)]
+    knowledge = logic.And()
+    for i in range(people):
+        knowledge.add(logic.Or(logic.And(knights[i], logic.Not(knaves[i])),
+                               logic.And(logic.Not(knights[i]), knaves[i])))
+    for i in range(people):
+        x, y = generator.sample([j for j in range(people) if j != i], 2)
+        statement = generator.choice([
+            knaves[x],
+            logic.Or(logic.And(knights[x], knights[y]), logic.And(knaves[x], knaves[y])),
+            logic.Or(knights[x], knaves[y]),
+            logic.Implication(knights[x], knaves[y]),
+        ])
+        knowledge.add(logic.And(logic.Or(logic.Not(knights[i]), statement),
+                                logic.Or(logic.Not(knaves[i]), logic.Not(statement))))
+    return knowledge, knights + knaves
+
+
+def report_pruning(name, knowledge, symbols):
+    logic.stats["nodes"] = 0
+    logic.stats["pruned"] = 0
+    start = time.perf_counter()
+    entailed = [logic.model_check(knowledge, symbol, method="partial") for symbol in symbols]
+    seconds = time.perf_counter() - start
+    full = sum(2 ** (len(knowledge.symbols() | symbol.symbols()) + 1) - 1 for symbol in symbols)
+    print(f"{name:20} {logic.stats['nodes']:10} nodes of {full:10}, "
+          f"{logic.stats['pruned']:8} branches cut, {1000 * seconds:9.3f} ms")
+    return entailed
+
+
+def random_sentence(symbols, generator, depth):
+    if depth == 0 or generator.random() < 0.2:
+        symbol = generator.choice(symbols)
+        return symbol if generator.random() < 0.7 else logic.Not(symbol)
+    kind = generator.choice(["and", "or", "not", "implication", "biconditional"])
+    if kind == "not":
+        return logic.Not(random_sentence(symbols, generator, depth - 1))
+    if kind in ["and", "or"]:
+        parts = [random_sentence(symbols, generator, depth - 1)
+                 for _ in range(generator.randint(1, 3))]
+        return logic.And(*parts) if kind == "and" else logic.Or(*parts)
+    left = random_sentence(symbols, generator, depth - 1)
+    right = random_sentence(symbols, generator, depth - 1)
+    if kind == "implication":
+        return logic.Implication(left, right)
+    return logic.Biconditional(left, right)
+
+
+def chain(count):
+    """
+    Returns (knowledge, query): P0 and a chain of implications from every
+    symbol to the next, entailing the last symbol.
+    """
+    symbols = [logic.Symbol(f"P{i}") for i in range(count)]
+    knowledge = logic.And(symbols[0])
+    for i in range(count - 1):
+        knowledge.add(logic.Implication(symbols[i], symbols[i + 1]))
+    return knowledge, symbols[-1]
+
+
+def cross_validate(methods, symbol_count, sentences, generator):
+    """
+    Returns the number of random knowledge bases and queries on which a
+    method disagrees with the recursive enumeration.
+    """
+    symbols = [logic.Symbol(f"P{i}") for i in range(symbol_count)]
+    disagree = 0
+    entailed = 0
+    for _ in range(sentences):
+        knowledge = logic.And(*(random_sentence(symbols, generator, 3)
+                                for _ in range(generator.randint(1, 4))))
+        query = random_sentence(symbols, generator, 2)
+        expected = logic.model_check(knowledge, query, method="recursive")
+        entailed += expected
+        for method in methods:
+            if logic.model_check(knowledge, query, method=method) != expected:
+                disagree += 1
+                print(f"{method} disagrees on {knowledge.formula()} |= {query.formula()}")
+    print(f"{sentences} random knowledge bases over {symbol_count} symbols, "
+          f"{entailed} entailments, {disagree} disagreements.")
+    return disagree
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--people", type=int, default=10,
+                        help="people in the generated puzzle")
+    parser.add_argument("--symbols", type=int, default=8,
+                        help="symbols of the random knowledge bases")
+    parser.add_argument("--sentences", type=int, default=300,
+                        help="random knowledge bases cross-validated")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    methods = ["recursive", "enumerate", "many", "partial", "dpll"]
+    if logic.numpy is not None:
+        methods.append("numpy")
+
+    interned_symbols = [logic.intern(symbol) for symbol in SYMBOLS]
+    puzzles = ([(name, knowledge, SYMBOLS) for name, knowledge in PUZZLES]
+               + [(f"{name}, interned", logic.intern(knowledge), interned_symbols)
+                  for name, knowledge in PUZZLES])
+
+    print(f"{'':20}" + "".join(f"{method:>16}" for method in methods))
+    baselines = {}
+    for name, knowledge, symbols in puzzles:
+        expected = solve(knowledge, "recursive", symbols)
+        times = []
+        for method in methods:
+            assert solve(knowledge, method, symbols) == expected, method
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                solve(knowledge, method, symbols)
+            times.append((time.perf_counter() - start) / args.repeat)
+        # speedups over the recursive enumeration of the knowledge base as built
+        baseline = baselines.setdefault(name.split(",")[0], times[0])
+        print(f"{name:20}" + "".join(f"{1000 * seconds:10.3f} ms {baseline / seconds:3.0f}x"
+                                     for seconds in times))
+
+    print()
+    for name, knowledge in PUZZLES:
+        report_pruning(name, knowledge, SYMBOLS)
+    knowledge, symbols = generated_puzzle(args.people, random.Random(args.seed))
+    entailed = report_pruning(f"{args.people} people", knowledge, symbols)
+    start = time.perf_counter()
+    assert solve(knowledge, "many", symbols) == [
+        symbol for symbol, result in zip(symbols, entailed) if result]
+    print(f"{'':20} all the {2 ** len(symbols)} models enumerated once: "
+          f"{1000 * (time.perf_counter() - start):9.3f} ms")
+
+    print()
+    methods = ["enumerate", "partial", "dpll"] + ([] if logic.numpy is None else ["numpy"])
+    cross_validate(methods, args.symbols, args.sentences, random.Random(args.seed))
+    for count, chain_methods in [(16, ["recursive"] + methods), (22, methods), (1000, ["dpll"])]:
+        knowledge, query = chain(count)
+        for method in chain_methods:
+            start = time.perf_counter()
+            assert logic.model_check(knowledge, query, method=method)
+            print(f"Chain of {count} implications, {method}: "
+                  f"{time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
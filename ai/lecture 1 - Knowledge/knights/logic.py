@@ -1,9 +1,37 @@
+import sat
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The truth table is evaluated 2 ** CHUNK_BITS models at a time
+CHUNK_BITS = 16
+
+# Nodes of the search of partial models, and branches it cut short
+stats = {"nodes": 0, "pruned": 0}
+
+# Python source of compiled sentences -> function, since compiling costs
+# more than evaluating a small knowledge base on all its models
+compiled = {}
+
+
 class Sentence():
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence on a model missing some symbols,
+        with Kleene's three-valued logic: returns True or False only when
+        every completion of the model agrees, None otherwise, which
+        includes some sentences every completion agrees on, as Or(A, Not(A))
+        gives None while A is missing.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -12,6 +40,36 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def literal(self, cnf):
+        """Returns a literal of cnf equivalent to the logical sentence."""
+        raise Exception("nothing to convert")
+
+    def evaluate_columns(self, columns):
+        """Evaluates the logical sentence on NumPy columns of many models."""
+        raise Exception("nothing to evaluate")
+
+    def expression(self, bits):
+        """Returns Python source evaluating the logical sentence on model m."""
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols):
+        """
+        Returns a function evaluating the logical sentence on a model given
+        as an int, with bit i set when symbols[i] is true.
+        """
+        bits = {symbol: i for i, symbol in enumerate(symbols)}
+        source = f"lambda m: bool({self.expression(bits)})"
+        if source not in compiled:
+            if len(compiled) >= 1000:
+                compiled.clear()
+            try:
+                compiled[source] = eval(source)
+            except (MemoryError, RecursionError, SyntaxError):
+                # nested too deep for the parser, evaluate the tree instead
+                return lambda m: self.evaluate(
+                    {symbol: bool(m >> i & 1) for symbol, i in bits.items()})
+        return compiled[source]
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -59,12 +117,31 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
     def symbols(self):
         return {self.name}
 
+    def literal(self, cnf):
+        return cnf.variable(self.name)
+
+    def evaluate_columns(self, columns):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def expression(self, bits):
+        try:
+            return f"(m & {1 << bits[self.name]})"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -83,12 +160,25 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
         return self.operand.symbols()
 
+    def literal(self, cnf):
+        return -cnf.literal(self.operand)
+
+    def evaluate_columns(self, columns):
+        return numpy.logical_not(self.operand.evaluate_columns(columns))
+
+    def expression(self, bits):
+        return f"(not {self.operand.expression(bits)})"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -97,7 +187,7 @@ class And(Sentence):
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return isinstance(other, And) and list(self.conjuncts) == list(other.conjuncts)
 
     def __hash__(self):
         return hash(
@@ -117,6 +207,16 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -126,6 +226,20 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def literal(self, cnf):
+        return cnf.conjunction([cnf.literal(conjunct) for conjunct in self.conjuncts])
+
+    def evaluate_columns(self, columns):
+        result = numpy.ones(len(next(iter(columns.values()))), dtype=bool)
+        for conjunct in self.conjuncts:
+            result &= conjunct.evaluate_columns(columns)
+        return result
+
+    def expression(self, bits):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(conjunct.expression(bits) for conjunct in self.conjuncts) + ")"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -134,7 +248,7 @@ class Or(Sentence):
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return isinstance(other, Or) and list(self.disjuncts) == list(other.disjuncts)
 
     def __hash__(self):
         return hash(
@@ -148,6 +262,16 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -157,6 +281,20 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def literal(self, cnf):
+        return cnf.disjunction([cnf.literal(disjunct) for disjunct in self.disjuncts])
+
+    def evaluate_columns(self, columns):
+        result = numpy.zeros(len(next(iter(columns.values()))), dtype=bool)
+        for disjunct in self.disjuncts:
+            result |= disjunct.evaluate_columns(columns)
+        return result
+
+    def expression(self, bits):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(disjunct.expression(bits) for disjunct in self.disjuncts) + ")"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -180,6 +318,17 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
@@ -188,6 +337,17 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def literal(self, cnf):
+        return cnf.disjunction([-cnf.literal(self.antecedent),
+                                cnf.literal(self.consequent)])
+
+    def evaluate_columns(self, columns):
+        return numpy.logical_or(numpy.logical_not(self.antecedent.evaluate_columns(columns)),
+                                self.consequent.evaluate_columns(columns))
+
+    def expression(self, bits):
+        return f"(not {self.antecedent.expression(bits)} or {self.consequent.expression(bits)})"
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -213,6 +373,15 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
@@ -221,9 +390,243 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def literal(self, cnf):
+        left = cnf.literal(self.left)
+        right = cnf.literal(self.right)
+        variable = cnf.new_variable()
+        cnf.clauses.extend([[-variable, -left, right], [-variable, left, -right],
+                            [variable, left, right], [variable, -left, -right]])
+        return variable
+
+    def evaluate_columns(self, columns):
+        return numpy.equal(self.left.evaluate_columns(columns),
+                           self.right.evaluate_columns(columns))
+
+    def expression(self, bits):
+        # each side is evaluated once, and compared as bools
+        return f"((not {self.left.expression(bits)}) == (not {self.right.expression(bits)}))"
+
+
+class Interned():
+    """
+    Immutable node shared by all the sentences with its structure, with
+    its hash, symbols, formula and compiled functions computed once. The
+    children of an interned node are interned too.
+    """
+
+    def freeze(self):
+        self.cached_hash = super().__hash__()
+        self.cached_symbols = super().symbols()
+        self.cached_formula = None
+        # Symbols -> compiled function
+        self.functions = {}
+        self.frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "frozen", False) and name != "cached_formula":
+            raise AttributeError("interned sentences are immutable")
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if isinstance(other, Interned):
+            return self is other
+        # compared structurally, without interning other
+        if not isinstance(other, Sentence) or hash(other) != self.cached_hash:
+            return False
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return self.cached_hash
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def symbols(self):
+        return set(self.cached_symbols)
+
+    def formula(self):
+        if self.cached_formula is None:
+            self.cached_formula = super().formula()
+        return self.cached_formula
+
+    def compile(self, symbols):
+        key = tuple(symbols)
+        if key not in self.functions:
+            self.functions[key] = super().compile(symbols)
+        return self.functions[key]
+
+
+class InternedSymbol(Interned, Symbol):
+    pass
+
+
+class InternedNot(Interned, Not):
+    pass
+
+
+class InternedAnd(Interned, And):
+    def add(self, conjunct):
+        raise AttributeError("interned sentences are immutable")
+
+
+class InternedOr(Interned, Or):
+    pass
+
+
+class InternedImplication(Interned, Implication):
+    pass
+
+
+class InternedBiconditional(Interned, Biconditional):
+    pass
+
+
+# (kind, name or ids of the interned children) -> interned node
+interned = {}
+
+
+def intern(sentence):
+    """Returns the interned node with the structure of sentence."""
+    if isinstance(sentence, Interned):
+        return sentence
+    if isinstance(sentence, Symbol):
+        key = ("symbol", sentence.name)
+        children = None
+    elif isinstance(sentence, Not):
+        key = ("not",)
+        children = [sentence.operand]
+    elif isinstance(sentence, And):
+        key = ("and",)
+        children = sentence.conjuncts
+    elif isinstance(sentence, Or):
+        key = ("or",)
+        children = sentence.disjuncts
+    elif isinstance(sentence, Implication):
+        key = ("implies",)
+        children = [sentence.antecedent, sentence.consequent]
+    elif isinstance(sentence, Biconditional):
+        key = ("biconditional",)
+        children = [sentence.left, sentence.right]
+    else:
+        raise TypeError("must be a logical sentence")
+
+    if children is not None:
+        children = [intern(child) for child in children]
+        key += tuple(id(child) for child in children)
+    node = interned.get(key)
+    if node is None:
+        kind = key[0]
+        if kind == "symbol":
+            node = InternedSymbol(sentence.name)
+        elif kind == "not":
+            node = InternedNot(*children)
+        elif kind == "and":
+            node = InternedAnd(*children)
+            node.conjuncts = tuple(node.conjuncts)
+        elif kind == "or":
+            node = InternedOr(*children)
+            node.disjuncts = tuple(node.disjuncts)
+        elif kind == "implies":
+            node = InternedImplication(*children)
+        else:
+            node = InternedBiconditional(*children)
+        node.freeze()
+        interned[key] = node
+    return node
+
+
+class CNF():
+    """
+    Clauses of int literals satisfiable exactly when the sentences added
+    are, by Tseitin's transformation: every compound subsentence gets a
+    new variable, with clauses making it equivalent to the subsentence.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.clauses = []
+        # Symbol name -> variable
+        self.variables = {}
+        # Subsentence -> literal, so that repeated subsentences share one
+        self.literals = {}
+
+    def copy(self):
+        cnf = CNF()
+        cnf.count = self.count
+        cnf.clauses = list(self.clauses)
+        cnf.variables = dict(self.variables)
+        cnf.literals = dict(self.literals)
+        return cnf
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        if sentence not in self.literals:
+            self.literals[sentence] = sentence.literal(self)
+        return self.literals[sentence]
+
+    def conjunction(self, literals):
+        variable = self.new_variable()
+        for literal in literals:
+            self.clauses.append([-variable, literal])
+        self.clauses.append([variable] + [-literal for literal in literals])
+        return variable
+
+    def disjunction(self, literals):
+        variable = self.new_variable()
+        for literal in literals:
+            self.clauses.append([variable, -literal])
+        self.clauses.append([-variable] + literals)
+        return variable
+
+    def add(self, sentence):
+        """Adds clauses true exactly when sentence is."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct) for disjunct in sentence.disjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """
+    Checks if knowledge base entails query, by enumerating all the models
+    with the sentences compiled to Python functions (method "enumerate")
+    or walking them (method "recursive"), by a search cutting the branches
+    decided by partial models (method "partial"), by evaluating the whole
+    truth table with NumPy (method "numpy") or by showing that knowledge
+    and not query is unsatisfiable with the DPLL solver of sat.py (method
+    "dpll").
+
+    The default is the enumeration, not the pruned search: on knowledge
+    bases as small as those of puzzle.py, evaluating every partial model
+    costs more than the branches it cuts (see benchmark.py). Pass
+    method="partial" for knowledge bases of many symbols.
+    """
+    if method == "dpll":
+        cnf = CNF()
+        cnf.add(knowledge)
+        cnf.add(Not(query))
+        return sat.solve(cnf.clauses, cnf.count) is None
+    if method == "numpy":
+        return truth_table_check(knowledge, [query])[0]
+    if method == "partial":
+        return partial_check(knowledge, query)
+    if method == "enumerate":
+        # Models are ints, bit i set when symbols[i] is true
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        knowledge_true = knowledge.compile(symbols)
+        query_true = query.compile(symbols)
+        return all(query_true(model) for model in range(1 << len(symbols))
+                   if knowledge_true(model))
+    if method != "recursive":
+        raise ValueError(f"unknown method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -258,3 +661,136 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def partial_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, assigning the symbols the most
+    frequent first and evaluating knowledge and query on every partial
+    model: a branch stops as soon as knowledge is false whatever the
+    remaining symbols, or knowledge is true and query decided.
+    """
+    counts = {}
+    symbol_counts(knowledge, counts)
+    symbol_counts(query, counts)
+    symbols = sorted(counts, key=lambda symbol: (-counts[symbol], symbol))
+    model = {}
+
+    def check(depth):
+        stats["nodes"] += 1
+        known = knowledge.evaluate_partial(model)
+        answer = None
+        if known is False:
+            answer = True
+        elif known is True:
+            answer = query.evaluate_partial(model)
+        if answer is not None:
+            if depth < len(symbols):
+                stats["pruned"] += 1
+            return answer
+
+        p = symbols[depth]
+        for value in (True, False):
+            model[p] = value
+            if not check(depth + 1):
+                del model[p]
+                return False
+        del model[p]
+        return True
+
+    return check(0)
+
+
+def symbol_counts(sentence, counts):
+    """Adds the number of occurrences of every symbol in sentence to counts."""
+    if isinstance(sentence, Symbol):
+        counts[sentence.name] = counts.get(sentence.name, 0) + 1
+    elif isinstance(sentence, Not):
+        symbol_counts(sentence.operand, counts)
+    elif isinstance(sentence, And):
+        for conjunct in sentence.conjuncts:
+            symbol_counts(conjunct, counts)
+    elif isinstance(sentence, Or):
+        for disjunct in sentence.disjuncts:
+            symbol_counts(disjunct, counts)
+    elif isinstance(sentence, Implication):
+        symbol_counts(sentence.antecedent, counts)
+        symbol_counts(sentence.consequent, counts)
+    elif isinstance(sentence, Biconditional):
+        symbol_counts(sentence.left, counts)
+        symbol_counts(sentence.right, counts)
+
+
+def model_check_many(knowledge, queries, method="enumerate"):
+    """
+    Checks which of queries knowledge base entails, returning a dict of
+    query -> entailed. The models of knowledge are enumerated once, as
+    ints with the sentences compiled (method "enumerate"), or with NumPy
+    (method "numpy"); with method "dpll", knowledge is converted to CNF
+    once and the solver run for each query.
+    """
+    queries = list(queries)
+    if method == "numpy":
+        return dict(zip(queries, truth_table_check(knowledge, queries)))
+    if method == "dpll":
+        base = CNF()
+        base.add(knowledge)
+        result = {}
+        for query in queries:
+            cnf = base.copy()
+            cnf.add(Not(query))
+            result[query] = sat.solve(cnf.clauses, cnf.count) is None
+        return result
+    if method == "recursive":
+        return {query: model_check(knowledge, query, method) for query in queries}
+    if method != "enumerate":
+        raise ValueError(f"unknown method {method}")
+
+    symbols = sorted(set.union(knowledge.symbols(), *[query.symbols() for query in queries]))
+    knowledge_true = knowledge.compile(symbols)
+    models = [model for model in range(1 << len(symbols)) if knowledge_true(model)]
+
+    # Bits set in every model, and bits clear in every model
+    always = (1 << len(symbols)) - 1
+    never = always
+    for model in models:
+        always &= model
+        never &= ~model
+    bits = {symbol: i for i, symbol in enumerate(symbols)}
+
+    result = {}
+    for query in queries:
+        if isinstance(query, Symbol):
+            result[query] = bool(always >> bits[query.name] & 1)
+        elif isinstance(query, Not) and isinstance(query.operand, Symbol):
+            result[query] = bool(never >> bits[query.operand.name] & 1)
+        else:
+            query_true = query.compile(symbols)
+            result[query] = all(query_true(model) for model in models)
+    return result
+
+
+def truth_table_check(knowledge, queries):
+    """
+    Checks which of queries knowledge base entails, by evaluating them on
+    every model at once: each symbol is a NumPy column of booleans over
+    the models, 2 ** CHUNK_BITS of them at a time to bound the memory.
+    """
+    if numpy is None:
+        raise Exception("the truth table model check needs NumPy")
+    symbols = sorted(set.union(knowledge.symbols(), *[query.symbols() for query in queries]))
+    entailed = [True] * len(queries)
+    size = 1 << min(len(symbols), CHUNK_BITS)
+    rows = numpy.arange(size, dtype=numpy.int64)
+    for start in range(0, 1 << len(symbols), size):
+        models = rows + start
+        columns = {symbol: (models >> i & 1).astype(bool) for i, symbol in enumerate(symbols)}
+        knowledge_true = knowledge.evaluate_columns(columns)
+        if not knowledge_true.any():
+            continue
+        for i, query in enumerate(queries):
+            if entailed[i] and not query.evaluate_columns(columns)[knowledge_true].all():
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
@@ -54,20 +54,24 @@ knowledge3.add(initializeStatement('C', AKnight))
 
 
 def main():
-    symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+    # interned, the sentences are only traversed once for all the checks;
+    # every model is enumerated once, faster on puzzles this small than the
+    # pruned search of model_check(..., method="partial")
+    symbols = [intern(symbol) for symbol in [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]]
     puzzles = [
-        ("Puzzle 0", knowledge0),
-        ("Puzzle 1", knowledge1),
-        ("Puzzle 2", knowledge2),
-        ("Puzzle 3", knowledge3)
+        ("Puzzle 0", intern(knowledge0)),
+        ("Puzzle 1", intern(knowledge1)),
+        ("Puzzle 2", intern(knowledge2)),
+        ("Puzzle 3", intern(knowledge3))
     ]
     for puzzle, knowledge in puzzles:
         print(puzzle)
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            entailed = model_check_many(knowledge, symbols)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if entailed[symbol]:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,150 @@
+"""
+DPLL satisfiability solver for clauses in conjunctive normal form.
+
+A clause is a list of int literals: variable v (from 1) is the literal v
+when true and -v when false. The solver assigns variables one at a time,
+each decision followed by unit propagation: a clause with all its
+literals false but one makes that one true. Every clause of two or more
+literals watches two of them that are not false, so an assignment only
+visits the clauses watching the literal it made false, and a conflict
+undoes the assignments back to the last decision not yet tried both
+ways, which is then flipped.
+"""
+
+# Numbers of decisions, propagated assignments and conflicts, for benchmarks
+stats = {"decisions": 0, "propagations": 0, "conflicts": 0}
+
+
+class Solver():
+    def __init__(self, clauses, count):
+        # Value of every variable, None while unassigned
+        self.values = [None] * (count + 1)
+        self.count = count
+        self.clauses = []
+        # Literal -> indices of the clauses watching it
+        self.watches = {}
+        # Assigned literals in order, and the index in it of every decision
+        self.trail = []
+        self.decisions = []
+        # Decisions whose other value has already been tried
+        self.flipped = []
+        # Index in the trail of the next assignment to propagate
+        self.head = 0
+        self.units = []
+        self.empty = False
+        for clause in clauses:
+            clause = list(dict.fromkeys(clause))
+            if any(-literal in clause for literal in clause):
+                # always true
+                continue
+            if not clause:
+                self.empty = True
+            elif len(clause) == 1:
+                self.units.append(clause[0])
+            else:
+                index = len(self.clauses)
+                self.clauses.append(clause)
+                self.watches.setdefault(clause[0], []).append(index)
+                self.watches.setdefault(clause[1], []).append(index)
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def assign(self, literal):
+        self.values[abs(literal)] = literal > 0
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Propagates the assignments not propagated yet, returns False on a
+        conflict.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            for position, index in enumerate(watching):
+                clause = self.clauses[index]
+                # keep the literal made false second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+                for i in range(2, len(clause)):
+                    if self.value(clause[i]) is not False:
+                        clause[1], clause[i] = clause[i], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        stats["conflicts"] += 1
+                        kept.extend(watching[position + 1:])
+                        self.watches[false] = kept
+                        return False
+                    stats["propagations"] += 1
+                    self.assign(clause[0])
+            self.watches[false] = kept
+        return True
+
+    def backtrack(self):
+        """
+        Undoes the assignments back to the last decision tried one way
+        only and flips it, returns False if there is none.
+        """
+        while self.decisions:
+            start = self.decisions.pop()
+            flipped = self.flipped.pop()
+            decision = self.trail[start]
+            for literal in self.trail[start:]:
+                self.values[abs(literal)] = None
+            del self.trail[start:]
+            self.head = start
+            if not flipped:
+                self.decisions.append(start)
+                self.flipped.append(True)
+                self.assign(-decision)
+                return True
+        return False
+
+    def solve(self):
+        """
+        Returns a satisfying model as a list of bools indexed by variable
+        (index 0 unused), or None if the clauses are unsatisfiable.
+        """
+        if self.empty:
+            return None
+        for literal in self.units:
+            if self.value(literal) is False:
+                return None
+            if self.value(literal) is None:
+                self.assign(literal)
+        # variables before it are assigned, until a backtrack undoes some
+        variable = 1
+        while True:
+            if not self.propagate():
+                if not self.backtrack():
+                    return None
+                variable = 1
+                continue
+            while variable <= self.count and self.values[variable] is not None:
+                variable += 1
+            if variable > self.count:
+                return [bool(value) for value in self.values]
+            stats["decisions"] += 1
+            self.decisions.append(len(self.trail))
+            self.flipped.append(False)
+            self.assign(variable)
+
+
+def solve(clauses, count):
+    """
+    Returns a model of the clauses over variables 1 to count, or None if
+    they are unsatisfiable.
+    """
+    return Solver(clauses, count).solve()